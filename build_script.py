@@ -1,170 +1,254 @@
+# Fully annotated so the module can be AOT-compiled with mypyc (`mypyc build_script.py`).
+import io
+import itertools
+import logging
+import sys
+from collections import deque
 from math import ceil
-
-CREATED_TIME_MIN = 24
-CONSUMING_HOURS = 12
-MATURATE_TIME_HOURS = 20
-CREATE_MACHINE = 3
-
-CONSUMING_TIME_MIN = CREATED_TIME_MIN / CREATE_MACHINE
-LOTE_SIZE = ceil((CONSUMING_HOURS * 60) / CONSUMING_TIME_MIN)
-CYCLE_BY_LOT = ceil((CONSUMING_HOURS * 60) / CREATED_TIME_MIN)
-MATURATE_CICLE = ceil((MATURATE_TIME_HOURS * 60) / CONSUMING_TIME_MIN)
-
-print(CONSUMING_TIME_MIN, LOTE_SIZE, CYCLE_BY_LOT, MATURATE_CICLE)
-
-lots = []
-consuming_lot = None
+from typing import Final
+
+CREATED_TIME_MIN: Final[int] = 24
+CONSUMING_HOURS: Final[int] = 12
+MATURATE_TIME_HOURS: Final[int] = 20
+CREATE_MACHINE: Final[int] = 3
+
+CONSUMING_TIME_MIN: Final[float] = CREATED_TIME_MIN / CREATE_MACHINE
+LOTE_SIZE: Final[int] = ceil((CONSUMING_HOURS * 60) / CONSUMING_TIME_MIN)
+CYCLE_BY_LOT: Final[int] = ceil((CONSUMING_HOURS * 60) / CREATED_TIME_MIN)
+MATURATE_CICLE: Final[int] = ceil((MATURATE_TIME_HOURS * 60) / CONSUMING_TIME_MIN)
+# Consumption starts after this cycle
+CONSUMING_START_CYCLE: Final[int] = 328
+
+logger = logging.getLogger(__name__)
+# Verbose traces are buffered in memory and written to stdout every N cycles
+TRACE_FLUSH_CYCLES: Final[int] = 256
+
+# Pallet types as small ints so they compare as ints and index per-type tables
+TYPE_A: Final[int] = 0
+TYPE_B: Final[int] = 1
+TYPE_C: Final[int] = 2
+TYPE_NAMES: Final = ("A", "B", "C")
+
+lots: deque["Lot"] = deque()
+# Lot currently receiving pallets, indexed by type
+open_lot: list["Lot | None"] = [None] * len(TYPE_NAMES)
 
 # Generators for lot and pallet numbers
-LOT_COUNTER = 0
-PALLET_COUNTER = 0
-
-
-def next_lot_id():
-    global LOT_COUNTER
-    LOT_COUNTER += 1
-    return LOT_COUNTER
-
-
-def next_pallet_id():
-    global PALLET_COUNTER
-    PALLET_COUNTER += 1
-    return PALLET_COUNTER
+lot_ids = itertools.count(1)
+pallet_ids = itertools.count(1)
 
 
 class Pallet(object):
-    type: str
+    __slots__ = ("type", "created_time", "mature_time", "id")
+
+    type: int
     created_time: int
+    mature_time: int
     id: int
 
-    def __init__(self, type, created_time):
+    def __init__(self, type: int, created_time: int) -> None:
         self.type = type
         self.created_time = created_time
-        self.id = next_pallet_id()
-
-    @property
-    def mature_time(self):
-        return self.created_time + MATURATE_CICLE
+        self.mature_time = created_time + MATURATE_CICLE
+        self.id = next(pallet_ids)
 
-    def __str__(self):
-        return f"P {self.type}{self.id} {self.created_time}/{self.mature_time}"
+    def __str__(self) -> str:
+        return f"P {TYPE_NAMES[self.type]}{self.id} {self.created_time}/{self.mature_time}"
 
 
 class Lot(object):
+    __slots__ = (
+        "id",
+        "pallets",
+        "type",
+        "creating_time",
+        "creation_finished",
+        "added",
+        "consumed",
+    )
+
     id: int
-    pallets: list[Pallet]
-    type: str
+    pallets: deque[Pallet]
+    type: int
     creating_time: int
-    creation_finished: bool = False
+    creation_finished: bool
+    added: int
+    consumed: int
 
-    def __init__(self, type, creating_time):
-        self.id = next_lot_id()
-        self.pallets = []
+    def __init__(self, type: int, creating_time: int) -> None:
+        self.id = next(lot_ids)
+        self.pallets = deque()
         self.type = type
         self.creating_time = creating_time
+        self.creation_finished = False
+        self.added = 0
+        self.consumed = 0
 
-    def add_pallet(self, pallet: Pallet):
+    def add_pallet(self, pallet: Pallet) -> None:
         self.pallets.append(pallet)
+        self.added += 1
         if len(self.pallets) == LOTE_SIZE:
             self.creation_finished = True
 
-    def get_next_pallet(self, cycle=None):
+    def count_mature(self, cycle: int) -> int:
+        # One machine feeds each type, so the k-th pallet of a lot arrives at
+        # creating_time + k * CREATE_MACHINE and matures MATURATE_CICLE later.
+        matured = (cycle - self.creating_time - MATURATE_CICLE) // CREATE_MACHINE + 1
+        # Consumed pallets are always a prefix of the mature ones.
+        return max(0, min(matured, self.added) - self.consumed)
+
+    def get_next_pallet(self, cycle: int | None = None) -> Pallet | None:
         # Return the next pallet only if available and mature.
         if not self.pallets:
-            print(f"Cycle: {cycle} {self.type}-{self.id} EMPTY")
+            logger.debug("Cycle: %s %s-%s EMPTY", cycle, TYPE_NAMES[self.type], self.id)
             return None
         pallet = self.pallets[0]
-        print(f"Cycle: {cycle} {self.type}-{self.id} {pallet.mature_time} ")
+        logger.debug("Cycle: %s %s-%s %s ", cycle, TYPE_NAMES[self.type], self.id, pallet.mature_time)
         if cycle is not None and pallet.mature_time > cycle:
             # Head is not mature yet; do not pop.
             return None
         # Head exists and is mature (or cycle not provided): consume it.
-        self.pallets.pop(0)
-        return pallet
+        self.consumed += 1
+        return self.pallets.popleft()
 
-    def __str__(self):
-        return f"L{self.type}-{self.id}[{len(self.pallets)}]"
+    def __str__(self) -> str:
+        return f"L{TYPE_NAMES[self.type]}-{self.id}[{len(self.pallets)}]"
 
 
-def add_pallet_to_lot(pallet: Pallet):
-    clot = None
-    for lot in lots:
-        if lot.type == pallet.type and not lot.creation_finished:
-            clot = lot
-            break
+def add_pallet_to_lot(pallet: Pallet) -> None:
+    clot = open_lot[pallet.type]
 
     if clot is None:
         clot = Lot(type=pallet.type, creating_time=pallet.created_time)
         lots.append(clot)
+        open_lot[pallet.type] = clot
+        logger.debug("Lot created: %s", clot)
 
     clot.add_pallet(pallet)
-    print(clot)
-
-
-def create_pallet(seq) -> Pallet | None:
-    type_pallet = None
-    if seq % CREATE_MACHINE == 1:
-        type_pallet = "A"
-    elif seq % CREATE_MACHINE == 2 and seq > CYCLE_BY_LOT:
-        type_pallet = "B"
-    elif seq % CREATE_MACHINE == 0 and seq > CYCLE_BY_LOT * 2:
-        type_pallet = "C"
-    if type_pallet is None:
-        return
-    return Pallet(type_pallet, seq)
-
-
-def consuming(cycle):
-    global consuming_lot
-    if consuming_lot is None:
-        # pick first non-empty lot, if any
-        consuming_lot = next((lot for lot in lots if lot.pallets), None)
-        if consuming_lot is None:
-            return None
+    if clot.creation_finished:
+        open_lot[clot.type] = None
+        logger.debug("Lot finished: %s", clot)
 
-    pallet = consuming_lot.get_next_pallet(cycle=cycle)
-
-    # If nothing consumable from current lot, try to advance to the next lot with pallets.
-    while pallet is None:
-        try:
-            current_lot_index = lots.index(consuming_lot)
-            # Remove the current lot if it's empty
-            if not consuming_lot.pallets:
-                lots.pop(current_lot_index)
-        except ValueError:
-            # consuming_lot no longer in lots (shouldn't happen, but guard anyway)
-            consuming_lot = None
-            return None
-        next_lot = None
-        for i in range(current_lot_index, len(lots)):
-            if lots[i].pallets:
-                next_lot = lots[i]
-                break
-        if next_lot is None:
-            consuming_lot = None
-            return None
-        consuming_lot = next_lot
-        pallet = consuming_lot.get_next_pallet(cycle=cycle)
-    return pallet
 
+# seq % CREATE_MACHINE -> (type, cycle after which that machine starts producing)
+PRODUCTION_SCHEDULE: Final = ((TYPE_C, CYCLE_BY_LOT * 2), (TYPE_A, 0), (TYPE_B, CYCLE_BY_LOT))
 
-def count_mature_pallets(lot, cycle):
-    count = 0
-    for pallet in lot.pallets:
-        if pallet.mature_time <= cycle:
-            count += 1
-    return count
 
+def create_pallet(seq: int) -> Pallet | None:
+    type_pallet, activation = PRODUCTION_SCHEDULE[seq % CREATE_MACHINE]
+    if seq <= activation:
+        return None
+    return Pallet(type_pallet, seq)
 
-for cycle in range(1, 501):
-    pallet = create_pallet(cycle)
-
-    if pallet:
-        add_pallet_to_lot(pallet)
 
-    if lots:
-        print(cycle, lots[0], count_mature_pallets(lots[0], cycle))
-    else:
-        print(0, cycle)
-    if cycle > 328:
-        consuming(cycle)
+def arrival_types(first_cycle: int, last_cycle: int) -> list[int | None]:
+    # Whole-run arrival timeline: the pallet type produced at each cycle, or None.
+    types: list[int | None] = [None] * (last_cycle - first_cycle + 1)
+    for residue, (type_pallet, activation) in enumerate(PRODUCTION_SCHEDULE):
+        start = max(first_cycle, activation + 1)
+        start += (residue - start) % CREATE_MACHINE
+        count = len(range(start, last_cycle + 1, CREATE_MACHINE))
+        types[start - first_cycle :: CREATE_MACHINE] = [type_pallet] * count
+    return types
+
+
+def consuming(cycle: int) -> Pallet | None:
+    # Lots are consumed in FIFO order and only the front lot is ever drained, so the
+    # consuming lot is always lots[0] and every lot behind it still holds pallets.
+    while lots:
+        lot = lots[0]
+        pallet = lot.get_next_pallet(cycle=cycle)
+        if pallet is not None or lot.pallets:
+            # Consumed, or the head is not mature yet
+            return pallet
+        lots.popleft()
+        # A removed lot no longer receives pallets
+        if open_lot[lot.type] is lot:
+            open_lot[lot.type] = None
+    return None
+
+
+def count_mature_pallets(lot: Lot, cycle: int) -> int:
+    return lot.count_mature(cycle)
+
+
+def reset() -> None:
+    # Clear the module state so simulate() can be run repeatedly in one process.
+    global lot_ids, pallet_ids
+    lots.clear()
+    open_lot[:] = [None] * len(TYPE_NAMES)
+    lot_ids = itertools.count(1)
+    pallet_ids = itertools.count(1)
+
+
+def flush_trace(buffer: io.StringIO) -> None:
+    sys.stdout.write(buffer.getvalue())
+    buffer.seek(0)
+    buffer.truncate()
+
+
+def simulate(max_cycle: int = 500, *, verbose: bool = False) -> dict[str, int]:
+    # Run from a clean state; verbose traces every cycle to stdout at DEBUG level.
+    reset()
+    previous_level, previous_propagate = logger.level, logger.propagate
+    buffer = io.StringIO()
+    handler = logging.StreamHandler(buffer)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    if verbose:
+        logger.setLevel(logging.DEBUG)
+        logger.addHandler(handler)
+        logger.propagate = False
+    produced = consumed = 0
+    # Bind constants and the level check once; the loop then only touches locals
+    start_cycle, flush_every = CONSUMING_START_CYCLE, TRACE_FLUSH_CYCLES
+    debug = logger.isEnabledFor(logging.DEBUG)
+    try:
+        logger.info("%s %s %s %s", CONSUMING_TIME_MIN, LOTE_SIZE, CYCLE_BY_LOT, MATURATE_CICLE)
+        arrivals = arrival_types(1, max_cycle)
+        cycle = 1
+        while cycle <= max_cycle:
+            type_pallet = arrivals[cycle - 1]
+            if type_pallet is not None:
+                add_pallet_to_lot(Pallet(type_pallet, cycle))
+                produced += 1
+
+            if debug:
+                if lots:
+                    logger.debug("%s %s %s", cycle, lots[0], count_mature_pallets(lots[0], cycle))
+                else:
+                    logger.debug("%s %s", 0, cycle)
+            if cycle <= start_cycle:
+                next_consume = start_cycle + 1
+            elif consuming(cycle) is not None:
+                consumed += 1
+                next_consume = cycle + 1
+            elif lots:
+                # Head of the front lot is not mature yet; nothing to consume before it is
+                next_consume = lots[0].pallets[0].mature_time
+            else:
+                # Nothing in stock; the next arrival wakes consumption up again
+                next_consume = max_cycle + 1
+            if verbose and cycle % flush_every == 0:
+                flush_trace(buffer)
+
+            if debug:
+                # The trace needs every cycle
+                cycle += 1
+            else:
+                # Event-driven: jump straight to the next arrival or consumption opportunity
+                next_arrival = cycle + 1
+                while next_arrival <= max_cycle and arrivals[next_arrival - 1] is None:
+                    next_arrival += 1
+                cycle = min(next_arrival, next_consume)
+    finally:
+        if verbose:
+            flush_trace(buffer)
+            logger.removeHandler(handler)
+        logger.setLevel(previous_level)
+        logger.propagate = previous_propagate
+    return {"produced": produced, "consumed": consumed, "in_stock": produced - consumed}
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    logger.info("%s", simulate(500))
@@ -4,12 +4,45 @@ from tkinter import filedialog, messagebox
 from tkinter import ttk
 import time
 import csv
-from typing import List, Tuple, Literal, Dict, Optional, Any
-from simulation import SimulationEngine, State, CellData, GridData, ALLOCATION_STRATEGIES, CONSUMPTION_STRATEGIES
+import functools
+import queue
+import threading
+from typing import List, Tuple, Literal, Dict, Optional, Any, Union
+from simulation import (
+    SimulationEngine,
+    State,
+    CellData,
+    GridData,
+    ORIGINS,
+    ALLOCATION_STRATEGIES,
+    CONSUMPTION_STRATEGIES,
+)
 
 
 # Types are imported from simulation.py
 
+CSV_BUFFER_SIZE = 1 << 20
+MINUTES_PER_DAY = 24 * 60
+# Counter columns shown per origin
+COUNTER_KEYS = ("total", "maduros", "maturacao")
+# Zero-padded two-digit strings for the hours and minutes shown by _format_minutes
+_HH = [f"{i:02d}" for i in range(24)]
+_MM = [f"{i:02d}" for i in range(60)]
+# Per-origin counters as returned by SimulationEngine.status_counts
+Counters = Dict[str, Dict[str, int]]
+# What the simulation thread publishes each cycle: grid, counters and the lot-start events of that step,
+# each paired with the counters at its minute (formatted into log lines on the Tk thread)
+Frame = Tuple[GridData, Counters, List[Tuple[Dict, Counters]]]
+
+
+def _csv_row(row: Tuple[State, int, int, int, Optional[int]]) -> Tuple[Any, ...]:
+    """One CSV row for a pallet row from SimulationEngine.iter_pallet_rows()."""
+    tipo, lote, pallet_id, criado, consumido = row
+    if consumido is None:
+        return tipo, lote, pallet_id, criado, "", ""
+    delta = max(0, consumido - criado)
+    return tipo, lote, pallet_id, criado, consumido, f"{delta // 60:02d}:{delta % 60:02d}"
+
 
 class HeatmapApp(tk.Tk):
     """
@@ -28,6 +61,9 @@ class HeatmapApp(tk.Tk):
 
     ROWS = 12
     COLS = 22
+    # Log history cap: once LOG_MAX_LINES is exceeded the oldest LOG_TRIM_LINES are dropped
+    LOG_MAX_LINES = 2000
+    LOG_TRIM_LINES = 500
 
     def __init__(self, cell_size: int = 40):
         super().__init__()
@@ -60,11 +96,14 @@ class HeatmapApp(tk.Tk):
             tlbl.grid(row=i, column=0, padx=6, pady=2, sticky="w")
             # Value columns placeholders
             row_labels: Dict[str, tk.Label] = {}
-            for j, key in enumerate(["total", "maduros", "maturacao"], start=1):
+            for j, key in enumerate(COUNTER_KEYS, start=1):
                 vlbl = tk.Label(self.summary_frame, text="0", font=("Arial", 11), bg="#fafafa")
                 vlbl.grid(row=i, column=j, padx=6, pady=2, sticky="w")
                 row_labels[key] = vlbl
             self.counter_labels[t] = row_labels
+        # Last value shown per counter label, seeded with the "0" the labels are created with;
+        # labels are only reconfigured (and the value only stringified) when the value changes
+        self._counter_last: Dict[Tuple[str, str], int] = {(t, key): 0 for t in self.types for key in COUNTER_KEYS}
 
         # Maturity rule (assumption): lote <= threshold => maduro; else em maturação
         self.maturity_threshold: int = 50
@@ -77,8 +116,9 @@ class HeatmapApp(tk.Tk):
         tk.Label(self.controls_frame, text="X:", bg="#f0f0f0").pack(side=tk.LEFT)
         self.x_var = tk.StringVar(value="24")
         vcmd = (self.register(self._validate_int), "%P")
-        self.x_entry = tk.Entry(self.controls_frame, width=6, textvariable=self.x_var,
-                                validate="key", validatecommand=vcmd)
+        self.x_entry = tk.Entry(
+            self.controls_frame, width=6, textvariable=self.x_var, validate="key", validatecommand=vcmd
+        )
         self.x_entry.pack(side=tk.LEFT, padx=(2, 10))
 
         # Strategy selection
@@ -86,19 +126,22 @@ class HeatmapApp(tk.Tk):
         # Keep stable order of keys to avoid string normalization issues
         self.alloc_keys = list(ALLOCATION_STRATEGIES.keys())
         self.alloc_var = tk.StringVar(value=self.alloc_keys[0])
-        self.alloc_combo = ttk.Combobox(self.controls_frame, width=22, state="readonly",
-                                        textvariable=self.alloc_var,
-                                        values=self.alloc_keys)
+        self.alloc_combo = ttk.Combobox(
+            self.controls_frame, width=22, state="readonly", textvariable=self.alloc_var, values=self.alloc_keys
+        )
         self.alloc_combo.current(0)
         self.alloc_combo.pack(side=tk.LEFT, padx=(2, 10))
 
         tk.Label(self.controls_frame, text="Consumo:", bg="#f0f0f0").pack(side=tk.LEFT)
         self.cons_keys = list(CONSUMPTION_STRATEGIES.keys())
         self.cons_var = tk.StringVar(value=self.cons_keys[0])
-        self.cons_combo = ttk.Combobox(self.controls_frame, width=22, state="readonly",
-                                       textvariable=self.cons_var,
-                                       values=self.cons_keys)
+        self.cons_combo = ttk.Combobox(
+            self.controls_frame, width=22, state="readonly", textvariable=self.cons_var, values=self.cons_keys
+        )
         self.cons_combo.current(0)
+        # Strategy classes in combobox order, so a selection index maps straight to its class
+        self._alloc_classes = [ALLOCATION_STRATEGIES[k] for k in self.alloc_keys]
+        self._cons_classes = [CONSUMPTION_STRATEGIES[k] for k in self.cons_keys]
         self.cons_combo.pack(side=tk.LEFT, padx=(2, 10))
 
         # Control buttons
@@ -118,9 +161,11 @@ class HeatmapApp(tk.Tk):
         self.speed = 1
         self.speed_buttons: Dict[int, tk.Button] = {}
         for val in self.speed_values:
-            btn = tk.Button(self.controls_frame, text=f"{val}x", command=lambda v=val: self.set_speed(v))
+            btn = tk.Button(self.controls_frame, text=f"{val}x", command=functools.partial(self.set_speed, val))
             btn.pack(side=tk.LEFT, padx=1)
             self.speed_buttons[val] = btn
+        self._speed_btn: Optional[tk.Button] = None  # the one button currently shown pressed
+        self._cycle_interval_s: float = 1.0 / self.speed  # wall-clock seconds between simulation cycles
         # Timer label
         self.timer_label = tk.Label(self.controls_frame, text="0d 00:00", font=("Arial", 11, "bold"), bg="#f0f0f0")
         self.timer_label.pack(side=tk.RIGHT)
@@ -129,18 +174,30 @@ class HeatmapApp(tk.Tk):
         self.lot_size_var = tk.StringVar(value="Tamanho do lote: -")
         self.lot_size_label = tk.Label(self.controls_frame, textvariable=self.lot_size_var, bg="#f0f0f0")
         self.lot_size_label.pack(side=tk.RIGHT, padx=(10, 0))
+        self._lot_size_text = "Tamanho do lote: -"  # text currently held by lot_size_var
 
         # Runtime state for scheduling
         self.running: bool = False
-        self._cycle_after_id: Optional[str] = None
-        self._timer_after_id: Optional[str] = None
+        self._drain_after_id: Optional[str] = None  # the single periodic UI tick (frames and timer)
+        self._timer_due: float = 0.0  # monotonic time at which the drain tick next refreshes the timer
         self._start_monotonic: float = 0.0  # kept for compatibility (unused for simulated time)
         self._elapsed_accum: float = 0.0  # kept for compatibility (unused for simulated time)
         self._sim_minutes_accum: float = 0.0  # simulated minutes accumulated based on X and speed
         self._last_timer_monotonic: float = 0.0  # timestamp of the last timer update
+        self._timer_last_minute: Optional[int] = 0  # whole minute currently shown by timer_label
+        self._fmt_cache: Dict[int, str] = {}  # _format_minutes results by whole minute (bounded)
 
         # Simulation engine instance (created on start)
         self.engine: Optional[SimulationEngine] = None
+        # The engine steps on a worker thread; it publishes frames (grid, counters, events) to the queue, or the
+        # exception that stopped it, and the Tk thread draws only the latest frame. _engine_lock guards the engine
+        # between the two threads; everything else (Tk, caches) is touched only by the Tk thread.
+        self._sim_thread: Optional[threading.Thread] = None
+        self._sim_stop = threading.Event()
+        # Set by set_speed and _stop_sim_thread to cut the worker's pause short
+        self._sim_wake = threading.Event()
+        self._engine_lock = threading.Lock()
+        self._frames: "queue.SimpleQueue[Union[Frame, Exception]]" = queue.SimpleQueue()
 
         # Highlight default speed
         self._update_speed_buttons()
@@ -151,6 +208,13 @@ class HeatmapApp(tk.Tk):
         # Cleanup on close
         self.protocol("WM_DELETE_WINDOW", self._on_close)
 
+        # Stop painting while the window is minimised; the newest unpainted frame is drawn on restore
+        self._paint_enabled: bool = True
+        self._unpainted_frame: Optional[Frame] = None
+        self._painted_grid: Optional[GridData] = None  # engine grid object last drawn by _paint_frame
+        self.bind("<Unmap>", self._on_unmap)
+        self.bind("<Map>", self._on_map)
+
         # Center area: left = canvas, right = log panel
         self.center_frame = tk.Frame(self)
         self.center_frame.pack(fill=tk.BOTH, expand=True)
@@ -164,20 +228,39 @@ class HeatmapApp(tk.Tk):
 
         # Define colors for states
         self.colors = {
-            'vazio': '#E0E0E0',  # light gray
-            'A': '#4FC3F7',  # light blue
-            'B': '#81C784',  # light green
-            'C': '#FFB74D',  # orange
+            "vazio": "#E0E0E0",  # light gray
+            "A": "#4FC3F7",  # light blue
+            "B": "#81C784",  # light green
+            "C": "#FFB74D",  # orange
         }
 
-        # Prepare storage for rect and text item ids for quick updates
-        self.rect_items: List[List[int]] = [[0 for _ in range(self.COLS)] for _ in range(self.ROWS)]
-        self.text_items: List[List[int]] = [[0 for _ in range(self.COLS)] for _ in range(self.ROWS)]
-
-        # Initialize default grid with vazio and lote 0
-        initial_grid: GridData = [[('vazio', 0) for _ in range(self.COLS)] for _ in range(self.ROWS)]
-        self._draw_grid(initial_grid)
-        self._update_counters(initial_grid)
+        # Cell text centres (cx, cy), row-major; cell_size never changes after init
+        sz = self.cell_size
+        self._cell_geom: List[Tuple[int, int]] = [
+            (c * sz + sz // 2, r * sz + sz // 2) for r in range(self.ROWS) for c in range(self.COLS)
+        ]
+        # Heatmap colours live in one image: a COLS x ROWS image with one pixel per cell,
+        # zoomed by cell_size into the image shown on the canvas (one blit per frame).
+        self._heatmap_px = tk.PhotoImage(width=self.COLS, height=self.ROWS)
+        self.heatmap_img = tk.PhotoImage(width=width, height=height)
+        self._heatmap_rows: List[List[str]] = [[self.colors["vazio"]] * self.COLS for _ in range(self.ROWS)]
+        # Tk photo data per row ("{#rrggbb ...}"), rebuilt only for rows whose colours changed
+        self._heatmap_row_data: List[str] = ["{" + " ".join(row) + "}" for row in self._heatmap_rows]
+        # Lote text font, shared by every cell
+        self._cell_font = ("Arial", max(10, self.cell_size // 3), "bold")
+        # Text item ids for quick updates, flat row-major (index = r * COLS + c)
+        self.text_items: List[int] = [0] * (self.ROWS * self.COLS)
+        # Last (state, lote) drawn per cell, so update_grid only touches cells that changed
+        self._last_cells: List[CellData] = [("vazio", 0)] * (self.ROWS * self.COLS)
+        # Row objects last walked by _render_cells (the engine's cached rows are reused while unchanged)
+        self._last_rows: List[Optional[List[CellData]]] = [None] * self.ROWS
+        # str(lote) memo; lote numbers repeat across cells and frames (bounded, lot ids keep growing)
+        self._lote_str: Dict[int, str] = {}
+
+        # Default grid with vazio and lote 0, built once and shared (grids are only ever read)
+        self._empty_grid: GridData = [[("vazio", 0)] * self.COLS for _ in range(self.ROWS)]
+        self._draw_grid(self._empty_grid)
+        self.update_grid(self._empty_grid)
 
         # Initialize log panel content
         self._append_log("Aplicação inicializada. Aguarde o início de um lote para registrar o status.")
@@ -185,36 +268,65 @@ class HeatmapApp(tk.Tk):
     def _draw_grid(self, grid: GridData) -> None:
         """Draws the full grid from scratch and stores canvas item ids for future updates."""
         self.canvas.delete("all")
-        for r in range(self.ROWS):
-            for c in range(self.COLS):
-                x0 = c * self.cell_size
-                y0 = r * self.cell_size
-                x1 = x0 + self.cell_size
-                y1 = y0 + self.cell_size
-
-                state, lote = grid[r][c]
-                fill_color = self.colors.get(state, self.colors['vazio'])
-
-                rect_id = self.canvas.create_rectangle(
-                    x0, y0, x1, y1,
-                    fill=fill_color,
-                    outline="#9E9E9E",
-                    width=1
-                )
+        self.canvas.create_image(0, 0, anchor="nw", image=self.heatmap_img)
 
-                # Centered text for lote number
-                cx = (x0 + x1) // 2
-                cy = (y0 + y1) // 2
-                text_color = "#000000" if state != 'C' else "#000000"  # keep black for readability
-                text_id = self.canvas.create_text(
-                    cx, cy,
-                    text=str(lote),
-                    fill=text_color,
-                    font=("Arial", max(10, self.cell_size // 3), "bold")
-                )
+        # Static cell borders, drawn once over the heatmap image
+        width = self.COLS * self.cell_size
+        height = self.ROWS * self.cell_size
+        for r in range(self.ROWS + 1):
+            y = r * self.cell_size
+            self.canvas.create_line(0, y, width, y, fill="#9E9E9E")
+        for c in range(self.COLS + 1):
+            x = c * self.cell_size
+            self.canvas.create_line(x, 0, x, height, fill="#9E9E9E")
+
+        for idx, (cx, cy) in enumerate(self._cell_geom):
+            r, c = divmod(idx, self.COLS)
+            state, lote = grid[r][c]
+            self._heatmap_rows[r][c] = self.colors[state]
+
+            # Centered text for lote number, black on every state for readability
+            text_id = self.canvas.create_text(cx, cy, text=self._lote_text(lote), fill="#000000", font=self._cell_font)
+
+            self.text_items[idx] = text_id
+            self._last_cells[idx] = (state, lote)
+        self._blit_heatmap(0, self.ROWS - 1)
+
+    def _blit_heatmap(self, first_row: int, last_row: int) -> None:
+        """Push rows first_row..last_row of the per-cell colours into the heatmap image.
+
+        One put() of the changed band into the one-pixel-per-cell image, then one zoomed copy of just
+        that band into the image shown on the canvas.
+        """
+        rows = self._heatmap_rows
+        row_data = self._heatmap_row_data
+        for r in range(first_row, last_row + 1):
+            row_data[r] = "{" + " ".join(rows[r]) + "}"
+        self._heatmap_px.put(" ".join(row_data[first_row : last_row + 1]), to=(0, first_row))
+        sz = self.cell_size
+        self.tk.call(
+            self.heatmap_img,
+            "copy",
+            self._heatmap_px,
+            "-from",
+            0,
+            first_row,
+            self.COLS,
+            last_row + 1,
+            "-to",
+            0,
+            first_row * sz,
+            "-zoom",
+            sz,
+        )
 
-                self.rect_items[r][c] = rect_id
-                self.text_items[r][c] = text_id
+    def _lote_text(self, lote: int) -> str:
+        text = self._lote_str.get(lote)
+        if text is None:
+            if len(self._lote_str) >= 4096:
+                self._lote_str.clear()
+            text = self._lote_str[lote] = str(lote)
+        return text
 
     def update_grid(self, grid: GridData) -> None:
         """
@@ -225,81 +337,86 @@ class HeatmapApp(tk.Tk):
         if len(grid) != self.ROWS or any(len(row) != self.COLS for row in grid):
             raise ValueError(f"Grid must be {self.ROWS}x{self.COLS}")
 
-        for r in range(self.ROWS):
-            for c in range(self.COLS):
-                state, lote = grid[r][c]
-                fill_color = self.colors.get(state, self.colors['vazio'])
-
-                rect_id = self.rect_items[r][c]
-                text_id = self.text_items[r][c]
-
-                # Update rectangle fill
-                self.canvas.itemconfigure(rect_id, fill=fill_color)
-                # Update text
-                self.canvas.itemconfigure(text_id, text=str(lote))
-
-        # Update summary counters
-        self._update_counters(grid)
-
-        # Ensure canvas updates visually
-        self.canvas.update_idletasks()
+        # Update cells and summary counters
+        self._painted_grid = None
+        if self.engine is None:
+            # Demo mode: the counters' grid heuristic is tallied during the same walk over the cells
+            counters: Dict[str, Dict[str, int]] = {t: {"total": 0, "maduros": 0, "maturacao": 0} for t in ORIGINS}
+            self._render_cells(grid, counters)
+            self._show_counters(counters)
+        else:
+            self._render_cells(grid)
+            self._update_counters()
+        # No explicit update_idletasks(): Tk repaints the canvas once at the next idle point,
+        # so several updates in a burst share one redraw
 
-    def _update_counters(self, grid: GridData) -> None:
-        """Compute and display counters per type (A, B, C) and totals.
+    def _render_cells(self, grid: GridData, counters: Optional[Dict[str, Dict[str, int]]] = None) -> None:
+        """Apply the cells that changed since the last frame to the heatmap image and lote texts.
 
-        Prefer accurate maturity based on SimulationEngine (20h since creation) when available.
-        Fallback: if engine is None, estimate using the grid and a threshold on lote numbers.
+        If counters is given, also tally every cell into it with the lote-threshold maturity heuristic.
         """
-        counters: Dict[str, Dict[str, int]] = {t: {"total": 0, "maduros": 0, "maturacao": 0} for t in ["A", "B", "C"]}
-
-        if self.engine is not None:
-            now_min = self.engine.now
-            # Count items directly from belts (dedicated + dynamic) to respect real pallets and their maturity
-            # Dedicated rows by origin
-            for origin in ["A", "B", "C"]:
-                for row in self.engine.origin_rows[origin]:
-                    for p in self.engine.belts[row]:
-                        counters[p.origin]["total"] += 1
-                        if p.is_mature(now_min):
-                            counters[p.origin]["maduros"] += 1
-                        else:
-                            counters[p.origin]["maturacao"] += 1
-            # Shared dynamic rows: attribute pallets to their own origin to avoid double counting
-            for row in getattr(self.engine, 'dynamic_rows', []):
-                for p in self.engine.belts[row]:
-                    counters[p.origin]["total"] += 1
-                    if p.is_mature(now_min):
-                        counters[p.origin]["maduros"] += 1
-                    else:
-                        counters[p.origin]["maturacao"] += 1
-        else:
-            # Fallback heuristic from grid (used only in demo mode without engine)
-            for r in range(self.ROWS):
-                for c in range(self.COLS):
-                    state, lote = grid[r][c]
-                    if state in counters:
-                        counters[state]["total"] += 1
-                        if lote <= self.maturity_threshold:
-                            counters[state]["maduros"] += 1
-                        else:
-                            counters[state]["maturacao"] += 1
-
+        last_cells = self._last_cells
+        last_rows = self._last_rows
+        cols = self.COLS
+        threshold = self.maturity_threshold
+        first_dirty = self.ROWS
+        last_dirty = -1
+        idx = 0
+        for r, row in enumerate(grid):
+            # The engine reuses a row object until that belt changes; it then matches last_cells already
+            if counters is None and row is last_rows[r]:
+                idx += cols
+                continue
+            last_rows[r] = row
+            for c, cell in enumerate(row):
+                last_state, last_lote = last_cells[idx]
+                state, lote = cell
+                if counters is not None and state in counters:
+                    tally = counters[state]
+                    tally["total"] += 1
+                    tally["maduros" if lote <= threshold else "maturacao"] += 1
+                # Skip cells that look the same as last frame (most of them between ticks)
+                if state != last_state or lote != last_lote:
+                    # Update heatmap pixel; the image is re-blitted once below
+                    if state != last_state:
+                        self._heatmap_rows[r][c] = self.colors[state]
+                        if r < first_dirty:
+                            first_dirty = r
+                        last_dirty = r
+                    # Update text
+                    if lote != last_lote:
+                        self.canvas.itemconfigure(self.text_items[idx], text=self._lote_text(lote))
+                    last_cells[idx] = (state, lote)
+                idx += 1
+        if last_dirty >= 0:
+            self._blit_heatmap(first_dirty, last_dirty)
+
+    def _update_counters(self) -> None:
+        """Display accurate counters per type (A, B, C) from the engine (20h since creation).
+
+        Without an engine (demo mode) update_grid tallies the grid heuristic in _render_cells instead.
+        """
+        # Counts from the engine's belts (dedicated + dynamic), by pallet origin;
+        # the simulation thread may be stepping the engine, so read it under the lock
+        with self._engine_lock:
+            counters = self.engine.status_counts(self.engine.now)
+        self._show_counters(counters)
+
+    def _show_counters(self, counters: Dict[str, Dict[str, int]]) -> None:
+        """Display per-type counters (A, B, C) and their totals."""
         # Compute totals across types
         totals = {"total": 0, "maduros": 0, "maturacao": 0}
-        for t in ["A", "B", "C"]:
+        for t in ORIGINS:
             for k in totals.keys():
                 totals[k] += counters[t][k]
 
-        # Update labels for A, B, C
-        for t in ["A", "B", "C"]:
-            self.counter_labels[t]["total"].configure(text=str(counters[t]["total"]))
-            self.counter_labels[t]["maduros"].configure(text=str(counters[t]["maduros"]))
-            self.counter_labels[t]["maturacao"].configure(text=str(counters[t]["maturacao"]))
-
-        # Update total row
-        self.counter_labels["Total"]["total"].configure(text=str(totals["total"]))
-        self.counter_labels["Total"]["maduros"].configure(text=str(totals["maduros"]))
-        self.counter_labels["Total"]["maturacao"].configure(text=str(totals["maturacao"]))
+        # Update labels for A, B, C and the total row, skipping values that did not change
+        last = self._counter_last
+        for t in ["A", "B", "C", "Total"]:
+            for k, value in (totals if t == "Total" else counters[t]).items():
+                if last.get((t, k)) != value:
+                    last[(t, k)] = value
+                    self.counter_labels[t][k].configure(text=str(value))
 
     # ----- Log panel & event handling -----
     def _build_log_panel(self, height: int) -> None:
@@ -307,8 +424,9 @@ class HeatmapApp(tk.Tk):
         self.log_frame.pack(side=tk.RIGHT, fill=tk.Y)
         title = tk.Label(self.log_frame, text="Log de Lotes", font=("Arial", 11, "bold"), bg="#f7f7f7")
         title.pack(side=tk.TOP, anchor="w", padx=6, pady=(6, 2))
-        self.log_text = tk.Text(self.log_frame, width=40, height=max(10, height // 20), wrap=tk.WORD, state=tk.DISABLED,
-                                bg="#fcfcfc")
+        self.log_text = tk.Text(
+            self.log_frame, width=40, height=max(10, height // 20), wrap=tk.WORD, state=tk.DISABLED, bg="#fcfcfc"
+        )
         # Enable text selection and copying with standard shortcuts even when disabled
         # Allow selecting text by mouse drag, and copying via Ctrl+C or context menu
         # Bind Ctrl+C and Command+C (macOS) to copy selection
@@ -327,30 +445,42 @@ class HeatmapApp(tk.Tk):
         self.log_text.configure(yscrollcommand=self.log_scroll.set)
         self.log_text.pack(side=tk.LEFT, fill=tk.Y, expand=False, padx=(6, 0), pady=(0, 6))
         self.log_scroll.pack(side=tk.RIGHT, fill=tk.Y, pady=(0, 6))
-
-    def _append_log(self, text: str) -> None:
-        if not hasattr(self, 'log_text'):
-            return
-        self.log_text.configure(state=tk.NORMAL)
-        self.log_text.insert(tk.END, text + "\n")
-        self.log_text.see(tk.END)
-        self.log_text.configure(state=tk.DISABLED)
         # Keep selection visible even when disabled
         try:
-            self.log_text.configure(inactiveselectbackground=self.log_text.cget('selectbackground'))
+            self.log_text.configure(inactiveselectbackground=self.log_text.cget("selectbackground"))
         except Exception:
             pass
+        # The text is kept disabled (read-only) and only enabled around programmatic edits
+        self._log_normal = functools.partial(self.log_text.configure, state=tk.NORMAL)
+        self._log_disabled = functools.partial(self.log_text.configure, state=tk.DISABLED)
+        self._log_line_count: int = 0
+
+    def _append_log(self, text: str) -> None:
+        self._append_log_lines([text])
+
+    def _append_log_lines(self, lines: List[str]) -> None:
+        """Append several log lines with a single insert."""
+        if not lines or not hasattr(self, "log_text"):
+            return
+        log_text = self.log_text
+        self._log_normal()
+        log_text.insert(tk.END, "\n".join(lines) + "\n")
+        self._log_line_count += len(lines)
+        if self._log_line_count > self.LOG_MAX_LINES:
+            # Trim in chunks so the delete (and the Text re-layout) stays rare
+            trim = max(self.LOG_TRIM_LINES, self._log_line_count - self.LOG_MAX_LINES)
+            log_text.delete("1.0", f"{trim + 1}.0")
+            self._log_line_count -= trim
+        log_text.see(tk.END)
+        self._log_disabled()
 
     def _clear_logs(self) -> None:
-        if not hasattr(self, 'log_text'):
+        if not hasattr(self, "log_text"):
             return
-        self.log_text.configure(state=tk.NORMAL)
-        self.log_text.delete('1.0', tk.END)
-        self.log_text.configure(state=tk.DISABLED)
-        try:
-            self.log_text.configure(inactiveselectbackground=self.log_text.cget('selectbackground'))
-        except Exception:
-            pass
+        self._log_normal()
+        self.log_text.delete("1.0", tk.END)
+        self._log_line_count = 0
+        self._log_disabled()
 
     # ----- Log copy helpers -----
     def _copy_log_selection(self) -> None:
@@ -394,72 +524,52 @@ class HeatmapApp(tk.Tk):
         except Exception:
             pass
 
-    def _snapshot_status(self, at_minute: int) -> Dict[str, Dict[str, int]]:
-        counters: Dict[str, Dict[str, int]] = {t: {"total": 0, "maduros": 0, "maturacao": 0} for t in ["A", "B", "C"]}
-        if self.engine is None:
-            return counters
-        for origin in ["A", "B", "C"]:
-            # Dedicated rows for each origin
-            for row in self.engine.origin_rows[origin]:
-                for p in self.engine.belts[row]:
-                    counters[p.origin]["total"] += 1
-                    if p.is_mature(at_minute):
-                        counters[p.origin]["maduros"] += 1
-                    else:
-                        counters[p.origin]["maturacao"] += 1
-        # Shared dynamic rows: count pallets by their own origin
-        for row in getattr(self.engine, 'dynamic_rows', []):
-            for p in self.engine.belts[row]:
-                counters[p.origin]["total"] += 1
-                if p.is_mature(at_minute):
-                    counters[p.origin]["maduros"] += 1
-                else:
-                    counters[p.origin]["maturacao"] += 1
-        return counters
-
-    def _process_engine_events(self) -> None:
-        if self.engine is None:
-            return
-        events = self.engine.drain_events()
-        if not events:
-            return
-        for ev in events:
-            if ev.get('type') == 'window_start':
-                t = ev.get('time', self.engine.now)
-                origin = ev.get('origin', '?')
-                lot_size = ev.get('lot_size', 0)
+    @staticmethod
+    def _collect_events(engine: SimulationEngine) -> List[Tuple[Dict, Counters]]:
+        """Simulation thread: drain the engine's lot-start events, each with the status at its minute.
+
+        Must run under _engine_lock right after the step that produced the events; the log lines are
+        formatted later on the Tk thread by _event_log_lines.
+        """
+        collected: List[Tuple[Dict, Counters]] = []
+        for ev in engine.drain_events():
+            if ev.get("type") == "window_start":
+                t = ev.get("time", engine.now)
+                collected.append((ev, engine.status_counts(t)))
+        return collected
+
+    def _event_log_lines(self, events: List[Tuple[Dict, Counters]]) -> List[str]:
+        """Log lines for lot-start events collected by _collect_events (Tk thread)."""
+        lines: List[str] = []
+        for ev, snap in events:
+            if ev.get("type") == "window_start":
+                t = ev.get("time", 0)
+                origin = ev.get("origin", "?")
+                lot_size = ev.get("lot_size", 0)
                 time_str = self._format_minutes(t)
-                snap = self._snapshot_status(t)
 
                 def fmt(o: str) -> str:
                     c = snap[o]
                     return f"{o} T={c['total']} M={c['maduros']} EmM={c['maturacao']}"
 
-                line = f"[{time_str}] Início de lote {origin} (tamanho={lot_size}). Status: " \
-                       f"{fmt('A')} | {fmt('B')} | {fmt('C')}"
-                self._append_log(line)
+                line = (
+                    f"[{time_str}] Início de lote {origin} (tamanho={lot_size}). Status: "
+                    f"{fmt('A')} | {fmt('B')} | {fmt('C')}"
+                )
+                lines.append(line)
+        return lines
 
     def export_csv(self) -> None:
         if self.engine is None:
             messagebox.showinfo("Exportar CSV", "A simulação ainda não foi iniciada.")
             return
-        try:
-            records = self.engine.get_pallet_records()
-        except Exception as e:
-            messagebox.showerror("Exportar CSV", f"Falha ao obter registros: {e}")
-            return
-        if not records:
+        if not self.engine.pallet_record_count():
             messagebox.showinfo("Exportar CSV", "Não há registros para exportar.")
             return
-        # Sort by creation time then pallet id for stability
-        try:
-            records.sort(key=lambda r: (r.get('criado_min', 0), r.get('pallet_id', 0)))
-        except Exception:
-            pass
         file_path = filedialog.asksaveasfilename(
             defaultextension=".csv",
             filetypes=[("CSV", "*.csv"), ("Todos os arquivos", "*.*")],
-            title="Salvar log em CSV"
+            title="Salvar log em CSV",
         )
         if not file_path:
             return
@@ -472,28 +582,15 @@ class HeatmapApp(tk.Tk):
             "Tempo entre produção e consumo (HH:MM)",
         ]
         try:
-            with open(file_path, mode="w", newline="", encoding="utf-8") as f:
+            # Rows are streamed straight from the engine (already in creation order), so memory stays flat
+            # however long the simulation ran; the engine lock keeps the worker from stepping meanwhile.
+            with (
+                self._engine_lock,
+                open(file_path, mode="w", newline="", encoding="utf-8", buffering=CSV_BUFFER_SIZE) as f,
+            ):
                 writer = csv.writer(f)
                 writer.writerow(headers)
-                for rec in records:
-                    consumido = rec.get('consumido_min')
-                    criado = rec.get('criado_min')
-                    if consumido is None or criado is None:
-                        tempo_fmt = ''
-                    else:
-                        try:
-                            delta = max(0, int(consumido) - int(criado))
-                            tempo_fmt = f"{delta // 60:02d}:{delta % 60:02d}"
-                        except Exception:
-                            tempo_fmt = ''
-                    writer.writerow([
-                        rec.get('tipo', ''),
-                        rec.get('lote', ''),
-                        rec.get('pallet_id', ''),
-                        rec.get('criado_min', ''),
-                        '' if consumido is None else consumido,
-                        tempo_fmt,
-                    ])
+                writer.writerows(map(_csv_row, self.engine.iter_pallet_rows()))
             messagebox.showinfo("Exportar CSV", f"Log exportado com sucesso para:\n{file_path}")
         except Exception as e:
             messagebox.showerror("Exportar CSV", f"Erro ao salvar CSV: {e}")
@@ -510,40 +607,42 @@ class HeatmapApp(tk.Tk):
             return False
 
     def _update_speed_buttons(self) -> None:
-        for val, btn in self.speed_buttons.items():
-            if val == self.speed:
-                btn.configure(relief=tk.SUNKEN, state=tk.DISABLED)
-            else:
-                btn.configure(relief=tk.RAISED, state=tk.NORMAL)
+        # Only the previously pressed button and the new one change
+        btn = self.speed_buttons.get(self.speed)
+        if btn is self._speed_btn:
+            return
+        if self._speed_btn is not None:
+            self._speed_btn.configure(relief=tk.RAISED, state=tk.NORMAL)
+        if btn is not None:
+            btn.configure(relief=tk.SUNKEN, state=tk.DISABLED)
+        self._speed_btn = btn
 
     def _set_strategy_controls_enabled(self, enabled: bool) -> None:
         try:
-            state = 'readonly' if enabled else 'disabled'
+            state = "readonly" if enabled else "disabled"
             self.alloc_combo.configure(state=state)
             self.cons_combo.configure(state=state)
         except Exception:
             pass
 
+    def _selected_strategy_indices(self) -> Tuple[int, int]:
+        # Resolve by index to avoid any Unicode normalization mismatch in displayed text; -1 if none
+        a_idx = self.alloc_combo.current()
+        c_idx = self.cons_combo.current()
+        if not (isinstance(a_idx, int) and 0 <= a_idx < len(self.alloc_keys)):
+            a_idx = -1
+        if not (isinstance(c_idx, int) and 0 <= c_idx < len(self.cons_keys)):
+            c_idx = -1
+        return a_idx, c_idx
+
     def _create_selected_strategies(self):
         try:
-            # Prefer resolving by index to avoid any Unicode normalization mismatch in displayed text
-            a_idx = getattr(self.alloc_combo, 'current', lambda: -1)()
-            c_idx = getattr(self.cons_combo, 'current', lambda: -1)()
-            if isinstance(a_idx, int) and 0 <= a_idx < len(getattr(self, 'alloc_keys', [])):
-                a_key = self.alloc_keys[a_idx]
-            else:
-                a_key = self.alloc_var.get()
-            if isinstance(c_idx, int) and 0 <= c_idx < len(getattr(self, 'cons_keys', [])):
-                c_key = self.cons_keys[c_idx]
-            else:
-                c_key = self.cons_var.get()
-            alloc_cls = ALLOCATION_STRATEGIES.get(a_key)
-            cons_cls = CONSUMPTION_STRATEGIES.get(c_key)
-            alloc = alloc_cls() if alloc_cls else None
-            cons = cons_cls() if cons_cls else None
-            return alloc, cons
+            a_idx, c_idx = self._selected_strategy_indices()
         except Exception:
             return None, None
+        alloc = self._alloc_classes[a_idx]() if a_idx >= 0 else None
+        cons = self._cons_classes[c_idx]() if c_idx >= 0 else None
+        return alloc, cons
 
     def _get_X(self) -> int:
         try:
@@ -558,17 +657,12 @@ class HeatmapApp(tk.Tk):
     def set_speed(self, value: int) -> None:
         if value <= 0:
             value = 1
+        # speed is kept >= 1 here, so readers (timer, simulation thread) use it without clamping.
+        # Waking the simulation thread restarts its pause with the new interval, so the speed applies at once
         self.speed = value
+        self._cycle_interval_s = 1.0 / value
+        self._sim_wake.set()
         self._update_speed_buttons()
-        # Reschedule cycle with new speed if running
-        if self.running:
-            if self._cycle_after_id is not None:
-                try:
-                    self.after_cancel(self._cycle_after_id)
-                except Exception:
-                    pass
-                self._cycle_after_id = None
-            self._schedule_cycle()
 
     def start(self) -> None:
         if not self.running:
@@ -585,21 +679,14 @@ class HeatmapApp(tk.Tk):
                     self.engine.consumption_strategy = cons
             # Update lot size label
             try:
-                self.lot_size_var.set(f"Tamanho do lote: {self.engine.lot_size}")
+                self._set_lot_size_text(f"Tamanho do lote: {self.engine.lot_size}")
             except Exception:
-                self.lot_size_var.set("Tamanho do lote: -")
+                self._set_lot_size_text("Tamanho do lote: -")
             # Log which strategies are active for transparency/debugging
             try:
-                a_idx = self.alloc_combo.current()
-                c_idx = self.cons_combo.current()
-                if isinstance(a_idx, int) and 0 <= a_idx < len(getattr(self, 'alloc_keys', [])):
-                    a_label = self.alloc_keys[a_idx]
-                else:
-                    a_label = self.alloc_var.get()
-                if isinstance(c_idx, int) and 0 <= c_idx < len(getattr(self, 'cons_keys', [])):
-                    c_label = self.cons_keys[c_idx]
-                else:
-                    c_label = self.cons_var.get()
+                a_idx, c_idx = self._selected_strategy_indices()
+                a_label = self.alloc_keys[a_idx] if a_idx >= 0 else self.alloc_var.get()
+                c_label = self.cons_keys[c_idx] if c_idx >= 0 else self.cons_var.get()
                 self._append_log(f"Estratégias ativas — Alocação: {a_label} | Consumo: {c_label}")
             except Exception:
                 pass
@@ -608,32 +695,25 @@ class HeatmapApp(tk.Tk):
             self._set_strategy_controls_enabled(False)
             # Initialize timer reference for simulated time
             self._last_timer_monotonic = time.monotonic()
-            self._schedule_cycle()
-            self._schedule_timer()
+            self._start_sim_thread()
+            self._timer_due = 0.0
+            self._schedule_drain()
 
     def pause(self) -> None:
         if self.running:
             # Finalize accumulation up to now
             self._update_timer()
             self.running = False
-            # Cancel scheduled callbacks
-            if self._cycle_after_id is not None:
-                try:
-                    self.after_cancel(self._cycle_after_id)
-                except Exception:
-                    pass
-                self._cycle_after_id = None
-            if self._timer_after_id is not None:
-                try:
-                    self.after_cancel(self._timer_after_id)
-                except Exception:
-                    pass
-                self._timer_after_id = None
+            # Stop the simulation thread and show whatever it produced before stopping
+            self._stop_sim_thread()
+            self._drain_frames()
+            # Cancel the scheduled UI tick
+            self._cancel_after("_drain_after_id")
             # Update timer label once with current simulated time (engine timeline if available)
             if self.engine is not None:
-                self.timer_label.configure(text=self._format_minutes(self.engine.now))
+                self._set_timer(self.engine.now)
             else:
-                self.timer_label.configure(text=self._format_minutes(self._sim_minutes_accum))
+                self._set_timer(self._sim_minutes_accum)
             # Re-enable strategy selectors when paused
             self._set_strategy_controls_enabled(True)
 
@@ -641,17 +721,16 @@ class HeatmapApp(tk.Tk):
         # Reset simulated time and stop then start fresh
         self.pause()
         self._sim_minutes_accum = 0.0
-        self.timer_label.configure(text=self._format_minutes(0.0))
+        self._set_timer(0.0)
         # Reset simulation engine (new X may apply)
         self.engine = None
         # Reset lot size label
         try:
-            self.lot_size_var.set("Tamanho do lote: -")
+            self._set_lot_size_text("Tamanho do lote: -")
         except Exception:
             pass
         # Reset the grid to vazio
-        initial_grid: GridData = [[('vazio', 0) for _ in range(self.COLS)] for _ in range(self.ROWS)]
-        self.update_grid(initial_grid)
+        self.update_grid(self._empty_grid)
         # Clear logs as part of restart
         self._clear_logs()
         # Re-enable strategy selectors after restart
@@ -659,33 +738,125 @@ class HeatmapApp(tk.Tk):
         # Não iniciar automaticamente após reiniciar; o usuário deve clicar em Iniciar
         # (deixe o estado parado)
 
-    def _schedule_cycle(self) -> None:
+    def _cancel_after(self, attr: str) -> None:
+        """Cancel the after() callback whose id is stored in attribute attr, if any, and clear it."""
+        aid = getattr(self, attr)
+        if aid is not None:
+            # Clear first so a second cancel is a no-op; Tcl ignores cancelling an id that already fired
+            setattr(self, attr, None)
+            self.after_cancel(aid)
+
+    def _start_sim_thread(self) -> None:
+        self._sim_stop.clear()
+        self._sim_wake.clear()
+        self._sim_thread = threading.Thread(target=self._sim_loop, args=(self.engine,), daemon=True)
+        self._sim_thread.start()
+
+    def _stop_sim_thread(self) -> None:
+        self._sim_stop.set()
+        self._sim_wake.set()
+        if self._sim_thread is not None:
+            self._sim_thread.join()
+            self._sim_thread = None
+
+    def _sim_loop(self, engine: SimulationEngine) -> None:
+        """Simulation thread: one consumption tick per cycle, speed cycles per second. Never touches Tk.
+
+        If the engine or a strategy raises, the exception is queued for the Tk thread and the thread ends.
+        """
+        try:
+            while not self._sim_stop.is_set():
+                with self._engine_lock:
+                    # Advance simulation by one consumption tick in minutes
+                    engine.step(engine.consumption_tick)
+                    frame = (engine.grid_as_cells(), engine.status_counts(engine.now), self._collect_events(engine))
+                self._frames.put(frame)
+                self._sim_pause()
+        except Exception as e:
+            self._frames.put(e)
+
+    def _sim_pause(self) -> None:
+        """Simulation thread: sleep one cycle interval, starting over whenever the speed changes.
+
+        Like the old rescheduled after() callback, the next cycle runs one new interval after a speed change;
+        a stop request ends the pause immediately.
+        """
+        while self._sim_wake.wait(self._cycle_interval_s):
+            self._sim_wake.clear()
+            if self._sim_stop.is_set():
+                return
+
+    def _schedule_drain(self) -> None:
         if not self.running:
             return
-        # Interval in ms based on speed (cycles per second)
-        interval_ms = max(1, int(1000 / max(1, self.speed)))
-        self._cycle_after_id = self.after(interval_ms, self._cycle_once)
+        # ~60 redraws per second at most, whatever the simulation speed
+        self._drain_after_id = self.after(16, self._drain_once)
 
-    def _cycle_once(self) -> None:
+    def _drain_once(self) -> None:
+        """The one periodic UI callback: draw queued frames and, when due, refresh the timer label."""
         if not self.running:
             return
-        if self.engine is None:
-            X = self._get_X()
-            self.engine = SimulationEngine(X_minutes=X)
-        # Advance simulation by one consumption tick in minutes
-        self.engine.step(self.engine.consumption_tick)
-        self.update_grid(self.engine.grid_as_cells())
-        # Process any engine events (e.g., new lot start) and append logs
-        self._process_engine_events()
-        # Continue scheduling next cycle
-        self._schedule_cycle()
-
-    def _schedule_timer(self) -> None:
-        # Update timer roughly every second; compute simulated minutes based on X and speed
-        if not self.running:
+        self._drain_frames()
+        now = time.monotonic()
+        if now >= self._timer_due:
+            self._update_timer()
+            # Once per second: every simulation cycle advances at least one whole minute, so the shown minute
+            # has always changed by then and a slower, speed-dependent period would only lag behind
+            self._timer_due = now + 1.0
+        self._schedule_drain()
+
+    def _drain_frames(self) -> None:
+        """Draw the latest published frame, log the events of every frame since the last drain,
+        and report the error that stopped the simulation thread, if any."""
+        frame = None
+        error: Optional[Exception] = None
+        lines: List[str] = []
+        try:
+            while True:
+                item = self._frames.get_nowait()
+                if isinstance(item, Exception):
+                    error = item
+                    break
+                frame = item
+                lines.extend(self._event_log_lines(frame[2]))
+        except queue.Empty:
+            pass
+        if frame is not None:
+            # Log lines are history and are always kept; only the drawing is skipped while hidden
+            self._append_log_lines(lines)
+            if not self._paint_enabled:
+                self._unpainted_frame = frame
+            else:
+                self._paint_frame(frame)
+        if error is not None:
+            self._on_sim_error(error)
+
+    def _on_sim_error(self, error: Exception) -> None:
+        """The simulation thread died: stop the run and tell the user instead of leaving the UI frozen."""
+        self._append_log(f"Erro na simulação: {error!r}")
+        self.pause()
+        messagebox.showerror("Simulação", f"A simulação parou por um erro:\n{error!r}")
+
+    def _paint_frame(self, frame: Frame) -> None:
+        grid, counters, _ = frame
+        # The engine hands out the same grid object until a pallet moves; nothing to diff then
+        if grid is not self._painted_grid:
+            self._render_cells(grid)
+            self._painted_grid = grid
+        self._show_counters(counters)
+
+    def _on_unmap(self, event) -> None:
+        # <Unmap>/<Map> bound on the root also fire for child widgets; only the toplevel matters here
+        if event.widget is self:
+            self._paint_enabled = False
+
+    def _on_map(self, event) -> None:
+        if event.widget is not self:
             return
-        self._update_timer()
-        self._timer_after_id = self.after(1000, self._schedule_timer)
+        self._paint_enabled = True
+        if self._unpainted_frame is not None:
+            self._paint_frame(self._unpainted_frame)
+            self._unpainted_frame = None
 
     def _update_timer(self) -> None:
         if not self.running:
@@ -693,7 +864,7 @@ class HeatmapApp(tk.Tk):
         # Display the simulation's relative time based on engine.now minutes for consistency
         if self.engine is not None:
             minutes = self.engine.now
-            self.timer_label.configure(text=self._format_minutes(minutes))
+            self._set_timer(minutes)
             return
         # Fallback: if engine not created yet, keep previous accumulation behavior
         now = time.monotonic()
@@ -702,43 +873,66 @@ class HeatmapApp(tk.Tk):
         delta_sec = max(0.0, now - self._last_timer_monotonic)
         self._last_timer_monotonic = now
         X = self._get_X()
-        self._sim_minutes_accum += delta_sec * X * max(1, self.speed)
-        self.timer_label.configure(text=self._format_minutes(self._sim_minutes_accum))
+        self._sim_minutes_accum += delta_sec * X * self.speed
+        self._set_timer(self._sim_minutes_accum)
+
+    def _set_timer(self, total_minutes_float: float) -> None:
+        """Show the simulated time, reconfiguring the label only when the displayed minute changes."""
+        total_minutes = int(total_minutes_float)
+        if total_minutes == self._timer_last_minute:
+            return
+        self._timer_last_minute = total_minutes
+        self.timer_label.configure(text=self._format_minutes(total_minutes))
+
+    def _set_lot_size_text(self, text: str) -> None:
+        # Pausing and resuming re-runs start(); only touch the Tk variable when the text changes
+        if text != self._lot_size_text:
+            self.lot_size_var.set(text)
+            self._lot_size_text = text
 
     def _format_minutes(self, total_minutes_float: float) -> str:
         total_minutes = int(total_minutes_float)
-        days = total_minutes // (24 * 60)
-        hours = (total_minutes % (24 * 60)) // 60
-        minutes = total_minutes % 60
-        return f"{days}d {hours:02d}:{minutes:02d}"
+        text = self._fmt_cache.get(total_minutes)
+        if text is not None:
+            return text
+        days, rest = divmod(total_minutes, MINUTES_PER_DAY)
+        hours, minutes = divmod(rest, 60)
+        text = str(days) + "d " + _HH[hours] + ":" + _MM[minutes]
+        if len(self._fmt_cache) >= 4096:
+            self._fmt_cache.clear()
+        self._fmt_cache[total_minutes] = text
+        return text
 
     def _on_close(self) -> None:
-        # Ensure callbacks are cancelled
-        try:
-            if self._cycle_after_id is not None:
-                self.after_cancel(self._cycle_after_id)
-        except Exception:
-            pass
-        try:
-            if self._timer_after_id is not None:
-                self.after_cancel(self._timer_after_id)
-        except Exception:
-            pass
+        # Ensure the simulation thread and callbacks are stopped
+        self._stop_sim_thread()
+        self._cancel_after("_drain_after_id")
         self.destroy()
 
 
-def demo_data(rows: int = 12, cols: int = 22) -> GridData:
+def demo_data_soa(rows: int = 12, cols: int = 22, seed: Optional[int] = None) -> Tuple[List[State], List[int]]:
+    """Random demo grid as two flat row-major columns (states, lotes) instead of per-cell tuples.
+
+    Pass a seed to get the same grid every time (e.g. as a repeatable synthetic load for profiling).
+    """
+    rng = random if seed is None else random.Random(seed)
+    states: List[State] = ["vazio", "A", "B", "C"]
+    # Draw all states and lotes in two bulk calls instead of two RNG calls per cell
+    n = rows * cols
+    cell_states = rng.choices(states, k=n)
+    lotes = [0 if st == "vazio" else lote for st, lote in zip(cell_states, rng.choices(range(1, 100), k=n))]
+    return cell_states, lotes
+
+
+def soa_to_grid(states: List[State], lotes: List[int], cols: int = 22) -> GridData:
+    """Rebuild the (state, lote) GridData rows from flat row-major columns."""
+    cells: List[CellData] = list(zip(states, lotes))
+    return [cells[i : i + cols] for i in range(0, len(cells), cols)]
+
+
+def demo_data(rows: int = 12, cols: int = 22, seed: Optional[int] = None) -> GridData:
     """Generate demo data with random states and lote numbers for visualization."""
-    states: List[State] = ['vazio', 'A', 'B', 'C']
-    data: GridData = []
-    for _ in range(rows):
-        row: List[CellData] = []
-        for _ in range(cols):
-            st = random.choice(states)
-            lote = 0 if st == 'vazio' else random.randint(1, 99)
-            row.append((st, lote))
-        data.append(row)
-    return data
+    return soa_to_grid(*demo_data_soa(rows, cols, seed), cols=cols)
 
 
 if __name__ == "__main__":
@@ -746,13 +940,20 @@ if __name__ == "__main__":
     app = HeatmapApp(cell_size=40)
     app.update_grid(demo_data())
 
-
     # Não iniciar automaticamente: aguarda o usuário clicar em Iniciar
     # (mantemos o bloco try/except anterior removido, pois não há chamada de start aqui)
 
-    def refresh(_event=None):
+    # A burst of clicks is coalesced into a single new grid at the next idle point
+    refresh_pending = [False]
+
+    def refresh_now():
+        refresh_pending[0] = False
         app.update_grid(demo_data())
 
+    def refresh(_event=None):
+        if not refresh_pending[0]:
+            refresh_pending[0] = True
+            app.after_idle(refresh_now)
 
     app.bind("<Button-1>", refresh)
     app.mainloop()
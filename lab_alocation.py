@@ -1,4 +1,7 @@
-from math import ceil
+import logging
+import sys
+from collections import deque
+from math import ceil, inf
 
 CREATED_TIME_MIN = 24
 CONSUMING_HOURS = 12
@@ -10,13 +13,28 @@ LOTE_SIZE = ceil((CONSUMING_HOURS * 60) / CONSUMING_TIME_MIN)
 CYCLE_BY_LOT = ceil((CONSUMING_HOURS * 60) / CONSUMING_TIME_MIN)
 MATURATE_CICLE = ceil((MATURATE_TIME_HOURS * 60) / CONSUMING_TIME_MIN)
 
-print(CONSUMING_TIME_MIN, LOTE_SIZE, CYCLE_BY_LOT, MATURATE_CICLE)
+logger = logging.getLogger(__name__)
 
-lots = []
+# Pallet sources as small ints (cheap equality, usable as indexes); SRC_NAMES is for display
+SRC_A, SRC_B, SRC_C = 0, 1, 2
+SRC_NAMES = ("A", "B", "C")
+
+lots: deque["Lot"] = deque()  # waiting lots, oldest first
+# Lookups mirroring `lots` (waiting lots, not yet picked for consumption): by id, and the open
+# (still being created) lot of each source
+lots_by_id: dict[int, "Lot"] = {}
+open_lot_by_source: dict[int, "Lot"] = {}
+# Ids of the lots in `lots` whose creation is finished
+finished_lot_ids: set[int] = set()
 consuming_lot = None
-dynamical_lot_ids = []
+dynamical_lot_ids: deque[int] = deque()  # FIFO of lot ids waiting for a dynamic line
 fix_storage_lines = []
 dynamic_storage_lines = []
+# Fixed storage lines grouped by their (never changing) source, in fix_storage_lines order
+fix_lines_by_source: dict[int, list["StorageLine"]] = {}
+# Dynamic lines by the lot they hold, in dynamic_storage_lines order; rebuilt by assign_dynamic_lines,
+# the only place that changes a dynamic line's active_lot
+dynamic_lines_by_lot: dict[int, list["StorageLine"]] = {}
 
 # Generators for lot and pallet numbers
 LOT_COUNTER = 0
@@ -36,38 +54,39 @@ def next_pallet_id():
 
 
 class Pallet(object):
-    source: str
+    __slots__ = ("source", "created_time", "id", "mature_time")
+    source: int
     created_time: int
     id: int
+    mature_time: int
 
     def __init__(self, source, created_time):
         self.source = source
         self.created_time = created_time
         self.id = next_pallet_id()
-
-    @property
-    def mature_time(self):
-        return self.created_time + MATURATE_CICLE
+        self.mature_time = created_time + MATURATE_CICLE
 
     def __str__(self):
-        return f"P{self.source}{self.id} [{self.created_time}/{self.mature_time}]"
+        return f"P{SRC_NAMES[self.source]}{self.id} [{self.created_time}/{self.mature_time}]"
 
     def simple(self, cycle):
-        return f"P{self.source}{'*' if cycle >= self.mature_time else ''}{self.id}"
+        return f"P{SRC_NAMES[self.source]}{'*' if cycle >= self.mature_time else ''}{self.id}"
 
 
 class Lot(object):
+    __slots__ = ("id", "pallets", "source", "creating_time", "creation_finished")
     id: int
-    pallets: list[Pallet]
-    source: str
+    pallets: deque[Pallet]
+    source: int
     creating_time: int
-    creation_finished: bool = False
+    creation_finished: bool
 
     def __init__(self, source, creating_time):
         self.id = next_lot_id()
-        self.pallets = []
+        self.pallets = deque()
         self.source = source
         self.creating_time = creating_time
+        self.creation_finished = False
 
     def add_pallet(self, pallet: Pallet):
         self.pallets.append(pallet)
@@ -75,60 +94,79 @@ class Lot(object):
             self.creation_finished = True
 
     def __str__(self):
-        return f"{self.source}-{self.id}[{len(self.pallets)}]"
+        return f"{SRC_NAMES[self.source]}-{self.id}[{len(self.pallets)}]"
 
     def count_mature_pallets(self, cycle):
+        # Pallets are added in creation order, so the mature ones are a prefix of the lot
         count = 0
         for pallet in self.pallets:
-            if pallet.mature_time <= cycle:
-                count += 1
+            if pallet.mature_time > cycle:
+                break
+            count += 1
         return count
 
 
 class StorageLine:
-    def __init__(self, id: int, size: int, active_source: str = None):
+    __slots__ = ("id", "size", "active_lot", "active_source", "pallets", "head_mature", "empty_slots", "_id_str")
+
+    def __init__(self, id: int, size: int, active_source: int | None = None):
         self.id = id
+        self._id_str = f"S{id}"  # fixed prefix of __str__, built once
         self.size = size
         self.active_lot = None
         self.active_source = active_source
-        self.pallets: list[Pallet] = []
+        self.pallets: deque[Pallet] = deque()
+        # Mature time of the head pallet (inf when empty) and free slots, updated on add/consume
+        self.head_mature = inf
+        self.empty_slots = size
 
     def __str__(self):
-        return f"S{self.id}[{self.active_lot if self.active_lot else self.active_source}][{len(self.pallets)}]"
+        source = SRC_NAMES[self.active_source] if self.active_source is not None else None
+        return f"{self._id_str}[{self.active_lot or source}][{len(self.pallets)}]"
 
-    def count_mature_items(self, source: str, cycle: int) -> int:
-        return sum(1 for p in self.pallets if p.source == source and p.mature_time <= cycle)
+    def count_mature_items(self, source: int, cycle: int) -> int:
+        # Mature pallets are a prefix of the line (added in creation order); stop at the first immature one
+        count = 0
+        for p in self.pallets:
+            if p.mature_time > cycle:
+                break
+            if p.source == source:
+                count += 1
+        return count
 
     def count_empty_spaces(self) -> int:
-        return self.size - len(self.pallets)
+        return self.empty_slots
 
     def can_add_pallet(self, pallet: Pallet) -> bool:
-        return len(self.pallets) < self.size and (self.active_source is None or self.active_source == pallet.source)
+        return self.empty_slots > 0 and (self.active_source is None or self.active_source == pallet.source)
 
     def add_pallet(self, pallet: Pallet) -> bool:
         if not self.can_add_pallet(pallet):
             return False
         if self.active_source is None:
             self.active_source = pallet.source
+        if not self.pallets:
+            self.head_mature = pallet.mature_time
         self.pallets.append(pallet)
-        print(self, "ADD", pallet)
+        self.empty_slots -= 1
+        logger.debug("%s ADD %s", self, pallet)
         return True
 
     def consume_pallet(self, cycle: int) -> Pallet | None:
-        if not self.pallets:
+        # Pallets are added in creation order, so the head is always the first to mature
+        if cycle < self.head_mature:
             return None
-        pallet = self.pallets[0]
-        if pallet.mature_time > cycle:
-            return None
-        pallet = self.pallets.pop(0)
-        print(self, "CONSUME", pallet)
+        pallet = self.pallets.popleft()
+        self.head_mature = self.pallets[0].mature_time if self.pallets else inf
+        self.empty_slots += 1
+        logger.debug("%s CONSUME %s", self, pallet)
         return pallet
 
-    def print_resume(self):
+    def print_resume(self, level=logging.DEBUG):
         output = str(self)
         for p in self.pallets:
             output += f"| {p.simple(cycle)}"
-        print(output)
+        logger.log(level, "%s", output)
 
 
 def assign_dynamic_lines(remove_lot=None):
@@ -137,67 +175,71 @@ def assign_dynamic_lines(remove_lot=None):
             if line.active_lot <= remove_lot:
                 line.active_lot = None
 
-    for lot in lots:
-        if lot.creation_finished:
-            for line in dynamic_storage_lines:
-                if line.active_lot <= lot.id:
-                    line.active_lot = None
+    # Release lines holding a finished lot, or an older one: everything up to the newest finished lot
+    if finished_lot_ids:
+        last_finished = max(finished_lot_ids)
+        for line in dynamic_storage_lines:
+            if line.active_lot <= last_finished:
+                line.active_lot = None
 
     for line in dynamic_storage_lines:
         if line.active_lot is None:
-            line.active_lot = dynamical_lot_ids.pop(0) if dynamical_lot_ids else None
+            line.active_lot = dynamical_lot_ids.popleft() if dynamical_lot_ids else None
 
             if line.active_lot:
-                line.active_source = next((lot.source for lot in lots if lot.id == line.active_lot), None)
-                print("Dynamic Line Assigned line:", line.id, line.active_lot)
+                lot = lots_by_id.get(line.active_lot)
+                line.active_source = lot.source if lot is not None else None
+                logger.debug("Dynamic Line Assigned line: %s %s", line.id, line.active_lot)
+
+    dynamic_lines_by_lot.clear()
+    for line in dynamic_storage_lines:
+        if line.active_lot is not None:
+            dynamic_lines_by_lot.setdefault(line.active_lot, []).append(line)
 
 
 def add_pallet_to_lot(pallet: Pallet):
-    clot = None
-    for lot in lots:
-        if lot.source == pallet.source and not lot.creation_finished:
-            clot = lot
-            break
+    clot = open_lot_by_source.get(pallet.source)
 
     if clot is None:
         clot = Lot(source=pallet.source, creating_time=pallet.created_time)
-        print("New lot created:", clot)
-        # Remove old lot IDs for the same source
-        dynamical_lot_ids[:] = [
-            lot_id
-            for lot_id in dynamical_lot_ids
-            if next((lot for lot in lots if lot.id == lot_id), None).source != pallet.source
-        ]
+        logger.debug("New lot created: %s", clot)
+        # Remove old lot IDs for the same source (rebuilt in place, the deque is module state)
+        kept = [lot_id for lot_id in dynamical_lot_ids if lots_by_id[lot_id].source != pallet.source]
+        dynamical_lot_ids.clear()
+        dynamical_lot_ids.extend(kept)
 
         dynamical_lot_ids.append(clot.id)
         dynamical_lot_ids.append(clot.id)
         assign_dynamic_lines()
         lots.append(clot)
+        lots_by_id[clot.id] = clot
+        open_lot_by_source[clot.source] = clot
 
     clot.add_pallet(pallet)
+    if clot.creation_finished:
+        del open_lot_by_source[clot.source]
+        if clot.id in lots_by_id:
+            finished_lot_ids.add(clot.id)
     return clot
 
 
+# Machine producing at each `seq % CREATE_MACHINE`, and the cycle after which it starts producing
+CREATE_SCHEDULE = ((SRC_C, CYCLE_BY_LOT * 2), (SRC_A, 0), (SRC_B, CYCLE_BY_LOT))
+
+
 def create_pallet(seq) -> Pallet | None:
-    source_pallet = None
-    if seq % CREATE_MACHINE == 1:
-        source_pallet = "A"
-    elif seq % CREATE_MACHINE == 2 and seq > CYCLE_BY_LOT:
-        source_pallet = "B"
-    elif seq % CREATE_MACHINE == 0 and seq > CYCLE_BY_LOT * 2:
-        source_pallet = "C"
-    if source_pallet is None:
+    source_pallet, start_after = CREATE_SCHEDULE[seq % CREATE_MACHINE]
+    if seq <= start_after:
         return
     return Pallet(source_pallet, seq)
 
 
 def consuming_by_storage(consuming_lot, cycle):
     # Check all storage lines for mature pallets from consuming lot
-    for line in fix_storage_lines:
-        if line.active_source == consuming_lot.source:
-            pallet = line.consume_pallet(cycle)
-            if pallet is not None:
-                return pallet
+    for line in fix_lines_by_source[consuming_lot.source]:
+        pallet = line.consume_pallet(cycle)
+        if pallet is not None:
+            return pallet
     return None
 
 
@@ -206,7 +248,7 @@ def consuming_by_dynamic(consuming_lot, cycle):
 
     # Check all dynamic storage lines for mature pallets from consuming lot
     for line in dynamic_storage_lines:
-        if line.pallets and line.pallets[0].source == consuming_lot.source and line.pallets[0].mature_time <= cycle:
+        if line.head_mature <= cycle and line.pallets[0].source == consuming_lot.source:
             mature_lines.append(line)
 
     if not mature_lines:
@@ -224,8 +266,12 @@ def consuming_by_dynamic(consuming_lot, cycle):
 
 def update_consuming_lot():
     global consuming_lot
-    consuming_lot = lots.pop(0) if lots else None
+    consuming_lot = lots.popleft() if lots else None
     if consuming_lot is not None:
+        del lots_by_id[consuming_lot.id]
+        finished_lot_ids.discard(consuming_lot.id)
+        if open_lot_by_source.get(consuming_lot.source) is consuming_lot:
+            del open_lot_by_source[consuming_lot.source]
         assign_dynamic_lines(remove_lot=consuming_lot.id)
     return consuming_lot
 
@@ -233,56 +279,63 @@ def update_consuming_lot():
 def consuming(cycle):
     global consuming_lot
 
-    if consuming_lot is None:
-        # pick first non-empty lot, if any
-        consuming_lot = update_consuming_lot()
+    # Each pass without a pallet pops the next lot, so this ends once `lots` runs out
+    while True:
         if consuming_lot is None:
-            return None
-    pallet = None
-    if storage_source_is_full(consuming_lot.source):
-        pallet = consuming_by_storage(consuming_lot, cycle)
-    if pallet is None:
-        pallet = consuming_by_dynamic(consuming_lot, cycle)
-    if pallet is None:
-        pallet = consuming_by_storage(consuming_lot, cycle)
-    if pallet is None:
+            # pick first non-empty lot, if any
+            consuming_lot = update_consuming_lot()
+            if consuming_lot is None:
+                return None
+        pallet = None
+        if storage_source_is_full(consuming_lot.source):
+            pallet = consuming_by_storage(consuming_lot, cycle)
+        if pallet is None:
+            pallet = consuming_by_dynamic(consuming_lot, cycle)
+        if pallet is None:
+            pallet = consuming_by_storage(consuming_lot, cycle)
+        if pallet is not None:
+            return pallet
         consuming_lot = update_consuming_lot()
         print_full_resume(cycle)
-        pallet = consuming(cycle)
-    return pallet
 
 
 def alocate_to_dynamic_storage(lot, pallet):
-    for line in dynamic_storage_lines:
-        if line.active_lot == lot.id and line.add_pallet(pallet):
+    for line in dynamic_lines_by_lot.get(lot.id, ()):
+        if line.add_pallet(pallet):
             return True
 
 
 def alocate_to_storage(pallet):
     # Try to find a storage line already containing the same source
-    for line in fix_storage_lines:
-        if line.active_source == pallet.source and line.can_add_pallet(pallet):
+    for line in fix_lines_by_source[pallet.source]:
+        if line.can_add_pallet(pallet):
             line.add_pallet(pallet)
             return True
     return False
 
 
 def storage_source_is_full(source):
-    for line in fix_storage_lines:
-        if line.active_source == source and line.count_empty_spaces() > 0:
+    for line in fix_lines_by_source[source]:
+        if line.empty_slots > 0:
             return False
     return True
 
 
-def print_full_resume(cycle=None):
-    print(f"Resume cycle: {cycle}")
+def print_full_resume(cycle=None, level=logging.DEBUG):
+    # Building the line dumps is the costly part; skip it when the level is not logged
+    if not logger.isEnabledFor(level):
+        return
+    logger.log(level, "Resume cycle: %s", cycle)
     for line in dynamic_storage_lines:
-        line.print_resume()
+        line.print_resume(level)
     for line in fix_storage_lines:
-        line.print_resume()
+        line.print_resume(level)
 
 
 if __name__ == "__main__":
+    # Per-pallet ADD/CONSUME traces and resumes are DEBUG; pass -v to see them
+    logging.basicConfig(level=logging.DEBUG if "-v" in sys.argv[1:] else logging.INFO, format="%(message)s")
+    logger.info("%s %s %s %s", CONSUMING_TIME_MIN, LOTE_SIZE, CYCLE_BY_LOT, MATURATE_CICLE)
     storage_size = 22
     dynamic_storage_lines = [
         StorageLine(id=1, size=storage_size),
@@ -290,16 +343,18 @@ if __name__ == "__main__":
         StorageLine(id=3, size=storage_size),
     ]
     fix_storage_lines = [
-        StorageLine(id=4, size=storage_size, active_source="A"),
-        StorageLine(id=5, size=storage_size, active_source="A"),
-        StorageLine(id=6, size=storage_size, active_source="A"),
-        StorageLine(id=7, size=storage_size, active_source="B"),
-        StorageLine(id=8, size=storage_size, active_source="B"),
-        StorageLine(id=9, size=storage_size, active_source="B"),
-        StorageLine(id=10, size=storage_size, active_source="C"),
-        StorageLine(id=11, size=storage_size, active_source="C"),
-        StorageLine(id=12, size=storage_size, active_source="C"),
+        StorageLine(id=4, size=storage_size, active_source=SRC_A),
+        StorageLine(id=5, size=storage_size, active_source=SRC_A),
+        StorageLine(id=6, size=storage_size, active_source=SRC_A),
+        StorageLine(id=7, size=storage_size, active_source=SRC_B),
+        StorageLine(id=8, size=storage_size, active_source=SRC_B),
+        StorageLine(id=9, size=storage_size, active_source=SRC_B),
+        StorageLine(id=10, size=storage_size, active_source=SRC_C),
+        StorageLine(id=11, size=storage_size, active_source=SRC_C),
+        StorageLine(id=12, size=storage_size, active_source=SRC_C),
     ]
+    for line in fix_storage_lines:
+        fix_lines_by_source.setdefault(line.active_source, []).append(line)
 
     for cycle in range(1, 399):
         if cycle >= 328:
@@ -313,6 +368,6 @@ if __name__ == "__main__":
                 if not alocate_to_storage(pallet):
                     assign_dynamic_lines()
                     if not alocate_to_dynamic_storage(lot, pallet):
-                        print_full_resume(cycle)
-                        print(f"Failed to allocate {lot} {pallet} to dynamic storage")
-                        print("--")
+                        print_full_resume(cycle, logging.WARNING)
+                        logger.warning("Failed to allocate %s %s to dynamic storage", lot, pallet)
+                        logger.warning("--")
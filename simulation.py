@@ -1,14 +1,23 @@
-import random
-from typing import List, Tuple, Literal, Dict, Optional, Any, Protocol
+import math
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import deque
+from itertools import islice
+from typing import List, Tuple, Literal, Dict, Optional, Any, Protocol, Iterator, Deque, Sequence
 
 # Public types
 State = Literal['vazio', 'A', 'B', 'C']
 CellData = Tuple[State, int]
 GridData = List[List[CellData]]
+# Pallet origins, in production/consumption rotation order
+ORIGINS: Tuple[State, ...] = ('A', 'B', 'C')
 
 
 # ---- Strategy Interfaces ----
 class AllocationStrategy(Protocol):
+    # Strategies may set a class attribute ``stateless = True`` to declare that their choice depends only on the
+    # engine state (no call-to-call memory, no clock reads besides head maturity). The engine then skips idle
+    # minutes in step() instead of re-asking every minute; undeclared strategies keep the minute-by-minute loop.
     def select_belt(self, engine: 'SimulationEngine', origin: State) -> Optional[int]:
         ...
 
@@ -23,12 +32,16 @@ class ConsumptionStrategy(Protocol):
 class MostFreeAllocation:
     """Pick the belt within origin rows with the most free space; tie-break by lowest row index."""
 
+    stateless = True
+
     def select_belt(self, engine: 'SimulationEngine', origin: State) -> Optional[int]:
         rows = engine.origin_rows[origin]
+        belts = engine.belts
+        capacity = engine.capacity_per_belt
         best_row = None
         best_free = -1
         for r in rows:
-            free = engine.capacity_per_belt - len(engine.belts[r])
+            free = capacity - len(belts[r])
             if free > best_free:
                 best_free = free
                 best_row = r
@@ -46,12 +59,17 @@ class RoundRobinAllocation:
     def select_belt(self, engine: 'SimulationEngine', origin: State) -> Optional[int]:
         rows = engine.origin_rows[origin]
         n = len(rows)
-        start = self._next_index[origin] % n
-        for k in range(n):
-            idx = (start + k) % n
+        belts = engine.belts
+        capacity = engine.capacity_per_belt
+        # _next_index only ever holds a valid index into rows; wrap it by comparison instead of modulo
+        idx = self._next_index[origin]
+        for _ in range(n):
             r = rows[idx]
-            if len(engine.belts[r]) < engine.capacity_per_belt:
-                self._next_index[origin] = (idx + 1) % n
+            idx += 1
+            if idx == n:
+                idx = 0
+            if len(belts[r]) < capacity:
+                self._next_index[origin] = idx
                 return r
         return None
 
@@ -66,6 +84,8 @@ class DedicatedThreePlusDynamicAllocation:
     Otherwise, pick the one with most free space within the preferred set; then fallback to dedicated.
     """
 
+    stateless = True
+
     def select_belt(self, engine: 'SimulationEngine', origin: State) -> Optional[int]:
         dedicated = engine.origin_rows[origin]
         capacity = engine.capacity_per_belt
@@ -75,25 +95,27 @@ class DedicatedThreePlusDynamicAllocation:
             # Para A: usar 2 esteiras dinâmicas (9 e 10) até completar 44 itens (2x22).
             # Depois disso, começar a inserir nas dedicadas (mantendo regra de não misturar).
             if engine.current_lot_produced['A'] < 44:
-                preferred_dynamic: List[int] = [9, 10]
+                preferred_dynamic: Tuple[int, ...] = (9, 10)
             else:
-                preferred_dynamic = []
+                preferred_dynamic = ()
         elif origin == 'B':
-            preferred_dynamic = [11]
+            preferred_dynamic = (11,)
         else:  # 'C' or others
-            preferred_dynamic = []
+            preferred_dynamic = ()
 
         # Infer next lot id without mutating engine state (for stickiness)
         next_lot = engine.peek_next_lot_id(origin)
         if next_lot is None:
             next_lot = engine.current_lot_id[origin]
 
+        belts = engine.belts
+
         # Helper to select most free from a list of rows
-        def select_most_free(from_rows: List[int]) -> Optional[int]:
+        def select_most_free(from_rows: Sequence[int]) -> Optional[int]:
             best_r = None
             best_free = -1
             for r in from_rows:
-                free = capacity - len(engine.belts[r])
+                free = capacity - len(belts[r])
                 if free > best_free:
                     best_free = free
                     best_r = r
@@ -105,13 +127,15 @@ class DedicatedThreePlusDynamicAllocation:
         if preferred_dynamic:
             candidates_same_lot: List[int] = []
             for r in preferred_dynamic:
-                belt = engine.belts[r]
+                belt = belts[r]
                 if len(belt) >= capacity:
                     continue
-                if any(p.lot_id == next_lot and p.origin == origin for p in belt):
+                # _try_produce never mixes lots on a belt, so the tail pallet's lot is the whole belt's lot
+                if belt and belt[-1].lot_id == next_lot and belt[-1].origin == origin:
                     candidates_same_lot.append(r)
             if candidates_same_lot:
-                best_row = max(candidates_same_lot, key=lambda rr: (capacity - len(engine.belts[rr]), -rr))
+                # Most free, then lowest row: free in the high bits, row (< 256) subtracted from the low ones
+                best_row = max(candidates_same_lot, key=lambda rr: ((capacity - len(belts[rr])) << 8) - rr)
                 return best_row
             # Otherwise pick the most free among preferred dynamic belts
             pick = select_most_free(preferred_dynamic)
@@ -124,13 +148,16 @@ class DedicatedThreePlusDynamicAllocation:
             return pick
 
         # 3) As a last resort (e.g., for 'C' when dedicated are full), allow any remaining dynamic belts
-        remaining_dynamic = [r for r in engine.dynamic_rows if r not in preferred_dynamic]
-        return select_most_free(remaining_dynamic)
+        if not preferred_dynamic:
+            return select_most_free(engine.dynamic_rows)
+        return select_most_free([r for r in engine.dynamic_rows if r not in preferred_dynamic])
 
 
 class PrioritizedFirstThreeConsumption:
     """Try dedicated belts first, then shared dynamic belts; consume only head pallets of the active origin that are mature."""
 
+    stateless = True
+
     def consume(self, engine: 'SimulationEngine', origin: State) -> bool:
         # Dedicated rows for this origin
         for r in engine.origin_rows[origin]:
@@ -146,18 +173,23 @@ class PrioritizedFirstThreeConsumption:
 class LongestQueueHeadConsumption:
     """Pick the belt (dedicated or dynamic) with the longest queue whose head is a mature pallet of the active origin; fallback scanning with origin check."""
 
+    stateless = True
+
     def consume(self, engine: 'SimulationEngine', origin: State) -> bool:
-        rows = engine.origin_rows[origin] + engine.dynamic_rows
-        # Find rows with mature head of the same origin
-        candidate_rows: List[int] = []
+        rows = engine.rows_union[origin]
+        belts = engine.belts
+        now = engine.now
+        # Single pass: among rows with a mature head of the same origin, keep the longest queue (first wins ties)
+        best_row = -1
+        best_len = 0
         for r in rows:
-            if engine.belts[r]:
-                head = engine.belts[r][0]
-                if head.origin == origin and head.is_mature(engine.now):
-                    candidate_rows.append(r)
-        if candidate_rows:
-            # Choose the one with the largest queue length
-            best_row = max(candidate_rows, key=lambda rr: len(engine.belts[rr]))
+            belt = belts[r]
+            if len(belt) > best_len:
+                head = belt[0]
+                if head.origin == origin and head.t_mature <= now:
+                    best_len = len(belt)
+                    best_row = r
+        if best_row >= 0:
             return engine.pop_if_mature_head_of_origin(best_row, origin)
         # Fallback: scan any row for mature head of origin
         for r in rows:
@@ -177,22 +209,25 @@ class DynamicLeastFreeSpaceConsumption:
       - Empate: menor índice de linha.
     """
 
+    stateless = True
+
     def consume(self, engine: 'SimulationEngine', origin: State) -> bool:
         capacity = engine.capacity_per_belt
 
-        def pick_row(rows: List[int]) -> Optional[int]:
+        def pick_row(rows: Sequence[int]) -> Optional[int]:
             best_r = None
-            best_metric = None  # menor espaços vagos
+            best_metric = 1 << 62  # menor espaços vagos
             for r in rows:
                 belt = engine.belts[r]
                 if not belt:
                     continue
                 head = belt[0]
-                if head.origin != origin or not head.is_mature(engine.now):
+                if head.origin != origin or head.t_mature > engine.now:
                     continue
                 free = capacity - len(belt)
-                metric = (free, r)  # ordenar por menos free, depois por menor índice
-                if best_metric is None or metric < best_metric:
+                # ordenar por menos free, depois por menor índice: free nos bits altos, linha (< 256) nos baixos
+                metric = (free << 8) | r
+                if metric < best_metric:
                     best_metric = metric
                     best_r = r
             return best_r
@@ -224,6 +259,8 @@ CONSUMPTION_STRATEGIES: Dict[str, Any] = {
 
 
 class Pallet:
+    __slots__ = ('origin', 't_prod', 't_mature', 'lot_id', 'pallet_id')
+
     def __init__(self, origin: State, t_prod_min: int, lot_id: int, maturation_minutes: int, pallet_id: int):
         self.origin: State = origin
         self.t_prod: int = t_prod_min
@@ -231,13 +268,12 @@ class Pallet:
         self.lot_id: int = lot_id
         self.pallet_id: int = pallet_id
 
-    def is_mature(self, now_min: int) -> bool:
-        return now_min >= self.t_mature
-
 
 class SimulationEngine:
     ROWS = 12
     COLS = 22
+    # Events kept for drain_events(); older ones are dropped once this many are pending
+    MAX_PENDING_EVENTS = 2048
 
     def __init__(self, X_minutes: int = 24, maturation_hours: int = 20, window_hours: int = 12, seed: int = 42,
                  allocation_strategy: Optional[AllocationStrategy] = None,
@@ -246,35 +282,47 @@ class SimulationEngine:
         self.X = max(1, int(X_minutes))
         self.maturation_minutes = int(maturation_hours * 60)
         self.window_minutes = int(window_hours * 60)
-        self.random = random.Random(seed)
+        # `seed` is accepted for API compatibility; the engine itself is fully deterministic
 
         # Time (minutes since start)
         self.now: int = 0
 
         # Event log to communicate with UI
-        self.events: List[Dict] = []
-
-        # Per-pallet records for CSV export
-        # key: pallet_id -> {'tipo': 'A'|'B'|'C', 'lote': int, 'pallet_id': int, 'criado_min': int, 'consumido_min': Optional[int]}
-        self.pallet_records: Dict[int, Dict[str, Any]] = {}
+        # Bounded so an engine nobody drains (e.g. headless runs) does not grow without limit
+        self.events: Deque[Dict] = deque(maxlen=self.MAX_PENDING_EVENTS)
+
+        # Per-pallet records for CSV export, one column per field, indexed by pallet_id - 1 (ids are dense:
+        # they are only handed out to placed pallets). consumido is -1 until the pallet is consumed.
+        self._rec_tipo: List[State] = []
+        self._rec_lote = array('q')
+        self._rec_criado = array('q')
+        self._rec_consumido = array('q')
         self.next_pallet_id: int = 1
 
-        # Belts: 12 lists (FIFO, head at index 0)
-        self.belts: List[List[Pallet]] = [[] for _ in range(self.ROWS)]
+        # Belts: 12 deques (FIFO, head at index 0)
+        self.belts: List[Deque[Pallet]] = [deque() for _ in range(self.ROWS)]
         self.capacity_per_belt = self.COLS
+        # grid_as_cells() buffers: one cached row per belt (None once that belt gains or loses a pallet)
+        # and the last assembled grid (None once any row is invalidated)
+        self._row_cells: List[Optional[List[CellData]]] = [None] * self.ROWS
+        self._grid_cache: Optional[GridData] = None
 
         # Strategy selection (defaults if none provided)
         self.allocation_strategy: AllocationStrategy = allocation_strategy or MostFreeAllocation()
         self.consumption_strategy: ConsumptionStrategy = consumption_strategy or DynamicLeastFreeSpaceConsumption()
 
-        # Origin to belts mapping (dedicated only): A→rows 0-2, B→4-6, C→8-10
-        # Global dynamic belts shared across all types: rows 3, 7, 11
-        self.origin_rows = {
-            'A': [0, 1, 2],
-            'B': [3, 4, 5],
-            'C': [6, 7, 8],
+        # Origin to belts mapping (dedicated only): A→rows 0-2, B→3-5, C→6-8
+        # Global dynamic belts shared across all types: rows 9-11
+        # Fixed for the engine's lifetime, so kept as tuples built once
+        self.origin_rows: Dict[State, Tuple[int, ...]] = {
+            'A': (0, 1, 2),
+            'B': (3, 4, 5),
+            'C': (6, 7, 8),
         }
-        self.dynamic_rows: List[int] = [9, 10, 11]
+        self.dynamic_rows: Tuple[int, ...] = (9, 10, 11)
+        # Dedicated rows of each origin followed by the dynamic rows (all belts an origin may occupy)
+        self.rows_union: Dict[State, Tuple[int, ...]] = {o: rows + self.dynamic_rows
+                                                         for o, rows in self.origin_rows.items()}
         # Para impedir mistura: consideramos a fila "ocupada" por um lote enquanto o último inserido tiver um lote diferente
 
         # Production scheduling
@@ -291,37 +339,91 @@ class SimulationEngine:
         self.current_lot_produced: Dict[State, int] = {'A': 0, 'B': 0, 'C': 0}
         self.current_lot_outstanding: Dict[State, int] = {'A': 0, 'B': 0, 'C': 0}
         self.lot_size = max(1, int(2160 // self.X))  # pallets per 12h at rate X/3 min
+        # Incremental maturity bookkeeping (avoids rescanning every belt each minute):
+        # sorted t_mature of the pallets of each origin currently on the belts, and the t_mature of the
+        # newest pallet of each origin's current lot (the lot's last maturation, pallets being created in order)
+        self.t_mature_on_belts: Dict[State, List[int]] = {'A': [], 'B': [], 'C': []}
+        self.current_lot_last_mature: Dict[State, Optional[int]] = {'A': None, 'B': None, 'C': None}
 
         # Phase 2 consumption scheduling
-        self.rotation = ['A', 'B', 'C']
+        self.rotation = ORIGINS
         self.rotation_idx = 0
         self.active_origin: Optional[State] = None
         self.window_end_time: int = 0
         self.next_consume_time: int = 0
         self.window_consumed: int = 0  # pallets consumed in the current window
-
-    @property
-    def consumption_tick(self) -> float:
-        # One pallet every X/3 minutes (allow fractional minutes)
-        return self.X / 3.0
+        # One pallet every X/3 minutes (allow fractional minutes); X is fixed per engine
+        self.consumption_tick: float = self.X / 3.0
 
     # ---- Core step ----
     def step(self, dt_minutes: int) -> None:
-        # Advance in 1-minute resolution to handle multiple events robustly
+        # Advance in 1-minute resolution to handle multiple events robustly. A minute that changed nothing is
+        # followed by a jump to the next minute where a time threshold can change the outcome (event-driven),
+        # when the strategies allow it; the result is the same as running every minute.
         steps = max(1, int(dt_minutes))
-        for _ in range(steps):
+        end = self.now + steps
+        before = self._state_signature()
+        while self.now < end:
             self._maybe_start_window()
             self._try_consume()
             self._try_produce()
             self.now += 1
+            after = self._state_signature()
+            if after == before and self.now < end:
+                nxt = self._next_event_minute()
+                self.now = end if nxt is None else min(end, nxt)
+            before = after
+
+    def _state_signature(self) -> Tuple[Any, ...]:
+        """Everything a minute of step() can change: pallets created/consumed, lots, window and rotation."""
+        return (self.next_pallet_id, self.global_next_lot_id, self.window_consumed, self.active_origin,
+                self.rotation_idx, self.window_end_time, self.next_consume_time)
+
+    def _next_event_minute(self) -> Optional[int]:
+        """After an idle minute, the first minute >= now at which a time comparison in step() can flip
+        (None if there is none, i.e. the engine stays idle).
+
+        Returns now (no skip) when a strategy does not declare itself stateless, since it may then behave
+        differently just from being asked again.
+        """
+        now = self.now
+        if not getattr(self.consumption_strategy, 'stateless', False):
+            return now
+        alloc_stateless = getattr(self.allocation_strategy, 'stateless', False)
+        candidates: List[float] = []
+        for origin in self.rotation:
+            next_prod = self.next_prod_time[origin]
+            if next_prod <= now and not alloc_stateless:
+                return now
+            candidates.append(next_prod)
+        end = self.window_end_time
+        candidates += (end, end + 1, self.next_consume_time)
+        if self.active_origin is None:
+            t_last = self._get_current_lot_last_mature(self.rotation[self.rotation_idx])
+            if t_last is not None:
+                candidates.append(t_last - self.window_minutes)
+        for belt in self.belts:
+            if belt:
+                candidates.append(belt[0].t_mature)
+        nxt = None
+        for t in candidates:
+            t = math.ceil(t)
+            if t >= now and (nxt is None or t < nxt):
+                nxt = t
+        return nxt
 
     # ---- Phase 1: Production ----
     def _try_produce(self) -> None:
-        for origin in ['A', 'B', 'C']:
-            if self.now < self.activation_time[origin]:
+        now = self.now
+        belts = self.belts
+        next_prod_time = self.next_prod_time
+        for origin in ORIGINS:
+            # next_prod_time starts at the origin's activation time and only grows, so this single check
+            # skips both origins not yet activated and origins with nothing due this minute
+            if now < next_prod_time[origin]:
                 continue
             # Attempt in a while loop if multiple productions scheduled at same minute
-            while self.now >= self.next_prod_time[origin]:
+            while now >= next_prod_time[origin]:
                 # Decide lot for next pallet; if None, production must wait until current lot is fully consumed
                 lot_id_opt = self._assign_lot(origin)
                 if lot_id_opt is None:
@@ -333,45 +435,47 @@ class SimulationEngine:
                     break
                 # Assign lot at creation time
                 lot_id = lot_id_opt
-                pallet_id = self.next_pallet_id
-                self.next_pallet_id += 1
-                pallet = Pallet(origin, self.now, lot_id, self.maturation_minutes, pallet_id)
-                # Record creation for CSV export
-                self.pallet_records[pallet_id] = {
-                    'tipo': origin,
-                    'lote': lot_id,
-                    'pallet_id': pallet_id,
-                    'criado_min': self.now,
-                    'consumido_min': None,
-                }
                 # Regra: não misturar itens na mesma fila: permitir inserir se fila vazia ou último item é do mesmo lote
-                belt = self.belts[target_row]
-                if belt and belt[-1].lot_id != lot_id:
+                belt = belts[target_row]
+                # A stateless strategy would just pick target_row again, so only a stateful one is asked twice
+                if belt and belt[-1].lot_id != lot_id and not getattr(self.allocation_strategy, 'stateless', False):
                     # tentar outra esteira compatível
                     alt_row = self.allocation_strategy.select_belt(self, origin)
                     if alt_row is not None and alt_row != target_row:
                         target_row = alt_row
-                        belt = self.belts[target_row]
+                        belt = belts[target_row]
                 # se ainda assim mistura, bloquear produção neste minuto
                 if belt and belt[-1].lot_id != lot_id:
                     # não avança next_prod_time; sai do while para tentar depois
-                    self.next_pallet_id -= 1
-                    # rollback record allocation placeholders
-                    del self.pallet_records[pallet_id]
                     return
-                self.belts[target_row].append(pallet)
+                # The pallet (and its id) only comes into existence once it has a belt
+                pallet_id = self.next_pallet_id
+                self.next_pallet_id += 1
+                pallet = Pallet(origin, now, lot_id, self.maturation_minutes, pallet_id)
+                belt.append(pallet)
+                # Record creation for CSV export
+                self._rec_tipo.append(origin)
+                self._rec_lote.append(lot_id)
+                self._rec_criado.append(now)
+                self._rec_consumido.append(-1)
+                self._row_cells[target_row] = self._grid_cache = None
+                # Production time only grows, so appending keeps the per-origin list sorted
+                self.t_mature_on_belts[origin].append(pallet.t_mature)
+                self.current_lot_last_mature[origin] = pallet.t_mature
                 # Update lot counters
                 self.current_lot_produced[origin] += 1
                 self.current_lot_outstanding[origin] += 1
-                self.next_prod_time[origin] += self.X
+                next_prod_time[origin] += self.X
 
     def _select_belt_for_origin(self, origin: State) -> Optional[int]:
         rows = self.origin_rows[origin]
         # Choose the belt with most free space; tie-break by earliest row index
         best_row = None
         best_free = -1
+        belts = self.belts
+        capacity = self.capacity_per_belt
         for r in rows:
-            free = self.capacity_per_belt - len(self.belts[r])
+            free = capacity - len(belts[r])
             if free > best_free:
                 best_free = free
                 best_row = r
@@ -397,6 +501,7 @@ class SimulationEngine:
         self.global_next_lot_id += 1
         self.current_lot_produced[origin] = 0
         self.current_lot_outstanding[origin] = 0
+        self.current_lot_last_mature[origin] = None
 
     def _assign_lot(self, origin: State) -> Optional[int]:
         """Return the lot id to assign for the next pallet of origin, or None if production must wait.
@@ -425,16 +530,11 @@ class SimulationEngine:
 
     # ---- Phase 2: Window scheduler and consumption ----
     def _get_current_lot_last_mature(self, origin: State) -> Optional[int]:
-        """Return the max t_mature among pallets of the current lot for the given origin, or None if none found."""
-        lot_id = self.current_lot_id[origin]
-        last = None
-        rows = self.origin_rows[origin] + self.dynamic_rows
-        for r in rows:
-            for p in self.belts[r]:
-                if p.origin == origin and p.lot_id == lot_id:
-                    if last is None or p.t_mature > last:
-                        last = p.t_mature
-        return last
+        """Return the max t_mature among pallets of the current lot for the given origin, or None if none found.
+
+        Tracked on production: exact while none of the lot has been consumed, which is when the window
+        scheduler asks (see _is_current_lot_fully_produced_and_unconsumed)."""
+        return self.current_lot_last_mature[origin]
 
     def _is_current_lot_fully_produced_and_unconsumed(self, origin: State) -> bool:
         """Lot must have all pallets produced and none consumed yet (so outstanding == produced == lot_size)."""
@@ -475,33 +575,16 @@ class SimulationEngine:
             pass
 
     def _count_ready_by_end(self, origin: State, end_time: int) -> int:
-        cnt = 0
-        rows = self.origin_rows[origin] + self.dynamic_rows
-        for r in rows:
-            for p in self.belts[r]:
-                if p.origin == origin and p.t_mature <= end_time:
-                    cnt += 1
-        return cnt
+        return bisect_right(self.t_mature_on_belts[origin], end_time)
 
     def _count_mature_until(self, origin: State, t: int) -> int:
         """Count pallets of origin with t_mature <= t across dedicated and dynamic rows."""
-        cnt = 0
-        rows = self.origin_rows[origin] + self.dynamic_rows
-        for r in rows:
-            for p in self.belts[r]:
-                if p.origin == origin and p.t_mature <= t:
-                    cnt += 1
-        return cnt
+        return bisect_right(self.t_mature_on_belts[origin], t)
 
     def _count_maturing_in_window(self, origin: State, start: int, end: int) -> int:
         """Count pallets of origin that mature in (start, end] interval across dedicated and dynamic rows."""
-        cnt = 0
-        rows = self.origin_rows[origin] + self.dynamic_rows
-        for r in rows:
-            for p in self.belts[r]:
-                if p.origin == origin and start < p.t_mature <= end:
-                    cnt += 1
-        return cnt
+        t_mature = self.t_mature_on_belts[origin]
+        return max(0, bisect_right(t_mature, end) - bisect_right(t_mature, start))
 
     def _try_consume(self) -> None:
         if self.active_origin is None:
@@ -549,12 +632,12 @@ class SimulationEngine:
         if not self.belts[row]:
             return False
         head = self.belts[row][0]
-        if head.is_mature(self.now):
-            popped = self.belts[row].pop(0)
+        if head.t_mature <= self.now:
+            popped = self.belts[row].popleft()
+            self._row_cells[row] = self._grid_cache = None
+            self._forget_t_mature(popped)
             # Record consumption time for CSV export
-            rec = self.pallet_records.get(popped.pallet_id)
-            if rec is not None and rec.get('consumido_min') is None:
-                rec['consumido_min'] = self.now
+            self._rec_consumido[popped.pallet_id - 1] = self.now
             # Decrement outstanding for the origin's current lot when applicable
             origin = popped.origin
             if popped.lot_id == self.current_lot_id[origin] and self.current_lot_outstanding[origin] > 0:
@@ -562,6 +645,10 @@ class SimulationEngine:
             return True
         return False
 
+    def _forget_t_mature(self, pallet: Pallet) -> None:
+        t_mature = self.t_mature_on_belts[pallet.origin]
+        del t_mature[bisect_left(t_mature, pallet.t_mature)]
+
     # Public wrappers for strategies
     def pop_if_mature_head(self, row: int) -> bool:
         return self._pop_if_mature_head(row)
@@ -572,12 +659,12 @@ class SimulationEngine:
         head = self.belts[row][0]
         if head.origin != origin:
             return False
-        if head.is_mature(self.now):
-            popped = self.belts[row].pop(0)
+        if head.t_mature <= self.now:
+            popped = self.belts[row].popleft()
+            self._row_cells[row] = self._grid_cache = None
+            self._forget_t_mature(popped)
             # Record consumption time for CSV export
-            rec = self.pallet_records.get(popped.pallet_id)
-            if rec is not None and rec.get('consumido_min') is None:
-                rec['consumido_min'] = self.now
+            self._rec_consumido[popped.pallet_id - 1] = self.now
             # Decrement outstanding for the origin's current lot when applicable
             if popped.lot_id == self.current_lot_id[origin] and self.current_lot_outstanding[origin] > 0:
                 self.current_lot_outstanding[origin] -= 1
@@ -586,25 +673,60 @@ class SimulationEngine:
 
     # ---- View helper ----
     def grid_as_cells(self) -> GridData:
-        grid: GridData = [[('vazio', 0) for _ in range(self.COLS)] for _ in range(self.ROWS)]
+        """Belt contents as ROWS x COLS (origin, lot_id) cells.
+
+        Rows are cached per belt and only rebuilt after that belt gains or loses a pallet, so unchanged
+        rows (and, on an idle engine, the whole grid) are the same objects as in the previous call.
+        Callers must treat the result as read-only.
+        """
+        if self._grid_cache is not None:
+            return self._grid_cache
+        row_cells = self._row_cells
         for r in range(self.ROWS):
-            belt = self.belts[r]
-            # Visual layout: head (consumption side) at rightmost column, tail/insertion at left.
-            # belts[r][0] is head (to be consumed first), belts[r][-1] is newest inserted (leftmost).
-            n = min(len(belt), self.COLS)
-            for idx in range(n):
-                p = belt[idx]
-                # Map logical index idx (0=head) to column c where c=COLS-1-idx so head is at right side.
-                c = self.COLS - 1 - idx
-                grid[r][c] = (p.origin, p.lot_id)
+            if row_cells[r] is None:
+                # Visual layout: head (consumption side) at rightmost column, tail/insertion at left.
+                # belts[r][0] is head (to be consumed first), belts[r][-1] is newest inserted (leftmost).
+                cells = [(p.origin, p.lot_id) for p in islice(self.belts[r], self.COLS)]
+                cells.reverse()
+                row_cells[r] = [('vazio', 0)] * (self.COLS - len(cells)) + cells
+        grid: GridData = list(row_cells)
+        self._grid_cache = grid
         return grid
 
+    def status_counts(self, at_minute: int) -> Dict[str, Dict[str, int]]:
+        """Per-origin pallet counts on all belts: total, mature ('maduros') and maturing ('maturacao')."""
+        counts: Dict[str, Dict[str, int]] = {}
+        for o, t_mature in self.t_mature_on_belts.items():
+            total = len(t_mature)
+            mature = bisect_right(t_mature, at_minute)
+            counts[o] = {'total': total, 'maduros': mature, 'maturacao': total - mature}
+        return counts
+
     def drain_events(self) -> List[Dict]:
-        ev = self.events
-        self.events = []
+        ev = list(self.events)
+        self.events.clear()
         return ev
 
+    def pallet_record_count(self) -> int:
+        """Number of pallets created so far (one record each)."""
+        return len(self._rec_lote)
+
+    def iter_pallet_rows(self) -> Iterator[Tuple[State, int, int, int, Optional[int]]]:
+        """Yield (tipo, lote, pallet_id, criado_min, consumido_min) per pallet, in creation order.
+
+        Pallet ids increase with creation time, so id order is creation-time-then-id order. consumido_min is
+        None for pallets still on the belts. The engine must not step while the iterator is being consumed.
+        """
+        for idx, (tipo, lote, criado, consumido) in enumerate(
+                zip(self._rec_tipo, self._rec_lote, self._rec_criado, self._rec_consumido)):
+            yield tipo, lote, idx + 1, criado, (None if consumido < 0 else consumido)
+
+    def iter_pallet_records(self) -> Iterator[Dict[str, Any]]:
+        """Yield pallet records as dicts (same order and caveat as iter_pallet_rows)."""
+        for tipo, lote, pallet_id, criado, consumido in self.iter_pallet_rows():
+            yield {'tipo': tipo, 'lote': lote, 'pallet_id': pallet_id, 'criado_min': criado,
+                   'consumido_min': consumido}
+
     def get_pallet_records(self) -> List[Dict[str, Any]]:
         """Return a snapshot list of pallet records for CSV export."""
-        # Return as a list to avoid accidental mutation by callers
-        return list(self.pallet_records.values())
+        return list(self.iter_pallet_records())
@@ -1,5 +1,8 @@
+import csv
 import simpy
 from collections import deque, defaultdict
+from itertools import accumulate
+from math import ceil
 
 # Optional plotting support
 try:
@@ -21,6 +24,8 @@ LANE_CAP = 22
 
 
 class Pallet:
+    __slots__ = ('id', 'origem', 't_prod')
+
     def __init__(self, id_, origem, t_prod):
         self.id = id_
         self.origem = origem  # 'A', 'B', ou 'C'
@@ -75,6 +80,10 @@ class Sistema:
         # Estado do lote atual (para UI): origem em consumo e quantidade já consumida
         self.current_batch_origin = None  # 'A' | 'B' | 'C' | None
         self.current_batch_count = 0  # 0..BATCH_PALLETS durante a janela
+        # Eventos de espera (substituem o polling minuto a minuto):
+        # space_event dispara quando uma esteira libera espaço ou muda de origem; stock_event quando um pallet entra
+        self.space_event = env.event()
+        self.stock_event = env.event()
 
     def total_ocupacao(self):
         return sum(len(e.q) for e in self.esteiras)
@@ -83,6 +92,16 @@ class Sistema:
         load = {e.name: (e.origem, len(e.q)) for e in self.esteiras}
         self.uso_esteiras_hist.append((self.env.now, load))
 
+    def notify_space(self):
+        ev = self.space_event
+        self.space_event = self.env.event()
+        ev.succeed()
+
+    def notify_stock(self):
+        ev = self.stock_event
+        self.stock_event = self.env.event()
+        ev.succeed()
+
     def log_event(self, tipo: str, origem: str):
         # tipo: 'created' ou 'consumed'
         # origem: 'A', 'B' ou 'C'
@@ -108,6 +127,7 @@ class Sistema:
                 e = empty.pop()
                 e.origem = origem
                 have += 1
+                self.notify_space()
         # Esteiras remanescentes vazias ficam sem origem até necessidade
 
     def push_pallet(self, pallet):
@@ -121,13 +141,16 @@ class Sistema:
             if empties:
                 e = empties[0]
                 e.origem = pallet.origem
-                return e.push(pallet)
             else:
                 # Sem espaço
                 return False
-        # escolhe a com maior espaço disponível
-        e = max(candidates, key=lambda x: x.space())
-        return e.push(pallet)
+        else:
+            # escolhe a com maior espaço disponível
+            e = max(candidates, key=lambda x: x.space())
+        if e.push(pallet):
+            self.notify_stock()
+            return True
+        return False
 
     def matured_inventory(self, origem):
         now = self.env.now
@@ -142,6 +165,21 @@ class Sistema:
                         break  # FIFO: se este não está pronto, os de trás podem até estar prontos, mas não liberáveis nesta esteira
         return count
 
+    def next_maturation(self, origem):
+        # Menor instante futuro em que a contagem de maturados de 'origem' pode crescer:
+        # em cada esteira, só o primeiro pallet ainda não pronto importa (FIFO)
+        now = self.env.now
+        nxt = None
+        for e in self.esteiras:
+            if e.origem == origem:
+                for p in e.q:
+                    if not p.pronto(now):
+                        t = p.t_prod + MATURACAO
+                        if nxt is None or t < nxt:
+                            nxt = t
+                        break
+        return nxt
+
     def pop_one_for(self, origem):
         now = self.env.now
         # tente retirar de qualquer esteira dessa origem com cabeça pronta
@@ -153,7 +191,9 @@ class Sistema:
         if not candidates:
             return None
         e = max(candidates, key=lambda x: len(x.q))
-        return e.pop_ready(now)
+        p = e.pop_ready(now)
+        self.notify_space()
+        return p
 
 
 def produtor(env, sistema: Sistema, origem: str):
@@ -166,13 +206,48 @@ def produtor(env, sistema: Sistema, origem: str):
         sistema.log_event('created', origem)
         # tentar armazenar, ou bloquear até liberar espaço
         start_wait = env.now
+        tentativa = env.now
         while not sistema.push_pallet(p):
-            yield env.timeout(1)  # espera 1 min antes de tentar de novo
+            # espera alguma esteira liberar espaço, mas só tenta de novo nos minutos cheios após a última
+            # tentativa (a mesma grade do antigo polling de 1 em 1 min, para não alterar os resultados)
+            yield sistema.space_event
+            proxima = max(tentativa + 1, start_wait + ceil(env.now - start_wait))
+            if env.now < proxima:
+                yield env.timeout(proxima - env.now)
+            tentativa = env.now
         wait = env.now - start_wait
         if wait > 0:
             sistema.block_time[origem] += wait
 
 
+def esperar_maturados(env, sistema: Sistema, origem, minimo, passo, limite=None):
+    # Equivale ao antigo polling "enquanto maturados < minimo (e now < limite): timeout(passo)", mas dorme
+    # direto até o ponto da grade (início + k*passo) em que a contagem pode ter mudado: a próxima maturação,
+    # um pallet que entrou ou o limite. O último timeout é criado um passo antes do ponto, como no polling,
+    # para manter a ordem dos eventos simultâneos e portanto os mesmos resultados.
+    ponto = env.now
+    while sistema.matured_inventory(origem) < minimo and (limite is None or env.now < limite):
+        while True:
+            if sistema.matured_inventory(origem) >= minimo:
+                t = env.now
+            else:
+                t = sistema.next_maturation(origem)
+                if limite is not None and (t is None or limite < t):
+                    t = limite
+            if t is None:
+                # nada amadurecendo: só um novo pallet pode mudar o quadro
+                yield sistema.stock_event
+                continue
+            alvo = ponto + passo * max(1, ceil((t - ponto) / passo))
+            if env.now < alvo - passo:
+                yield env.timeout(alvo - passo - env.now) | sistema.stock_event
+                if env.now < alvo - passo:
+                    continue  # entrou um pallet: recalcular o alvo
+            yield env.timeout(alvo - env.now)
+            ponto = alvo
+            break
+
+
 def scheduler_lotes(env, sistema: Sistema):
     # política simples: rodada A->B->C, mas só inicia lote se maturados >= 60.
     ordem = ['A', 'B', 'C']
@@ -184,8 +259,7 @@ def scheduler_lotes(env, sistema: Sistema):
         quotas = {alvo: 5, ordem[(idx + 1) % 3]: 4, ordem[(idx + 2) % 3]: 3}
         sistema.assign_lanes(quotas)
         # esperar até haver pelo menos 60 maturados
-        while sistema.matured_inventory(alvo) < 60:
-            yield env.timeout(5)  # reavalia a cada 5 min
+        yield from esperar_maturados(env, sistema, alvo, 60, 5)  # reavalia na grade de 5 min
         # sinalizar início do lote
         sistema.current_batch_origin = alvo
         sistema.current_batch_count = 0
@@ -195,10 +269,8 @@ def scheduler_lotes(env, sistema: Sistema):
             if sistema.matured_inventory(alvo) == 0:
                 # aguarda próximo desbloqueio (maturação/chegada à cabeça)
                 start_idle = env.now
-                # dormir um pouco até que pelo menos um esteja pronto
-                # (vá de 1 em 1 min para reavaliar)
-                while sistema.matured_inventory(alvo) == 0 and env.now < fim_lote:
-                    yield env.timeout(1)
+                # dormir até que pelo menos um esteja pronto ou acabe o lote (grade de 1 em 1 min)
+                yield from esperar_maturados(env, sistema, alvo, 1, 1, fim_lote)
                 sistema.idle_time_f2 += env.now - start_idle
             # retirar um pallet se disponível
             pallet = sistema.pop_one_for(alvo)
@@ -226,10 +298,10 @@ def export_events_csv(events, filename='container_events.csv'):
     # Exporta eventos para CSV com colunas: time_min,tipo,origem
     try:
         events_sorted = sorted(events, key=lambda x: x[0])
-        with open(filename, 'w') as f:
-            f.write('time_min,tipo,origem\n')
-            for t, tipo, origem in events_sorted:
-                f.write(f'{int(t)},{tipo},{origem}\n')
+        with open(filename, 'w', newline='') as f:
+            writer = csv.writer(f, lineterminator='\n')
+            writer.writerow(('time_min', 'tipo', 'origem'))
+            writer.writerows((int(t), tipo, origem) for t, tipo, origem in events_sorted)
         print(f'Eventos exportados para: {filename}')
     except Exception as e:
         print(f'Falha ao salvar CSV de eventos: {e}')
@@ -244,29 +316,10 @@ def display_container_flow(events, filename='container_flow.png'):
     if not events_sorted:
         print('Sem eventos para plotar.')
         return None
-    # Construir séries cumulativas
-    times = []
-    created_cum = []
-    consumed_cum = []
-    c_created = 0
-    c_consumed = 0
-    last_t = None
-    for t, tipo, _ in events_sorted:
-        if last_t is not None and t != last_t:
-            # manter o valor até o próximo instante (para step)
-            times.append(last_t)
-            created_cum.append(c_created)
-            consumed_cum.append(c_consumed)
-        last_t = t
-        if tipo == 'created':
-            c_created += 1
-        elif tipo == 'consumed':
-            c_consumed += 1
-        times.append(t)
-        created_cum.append(c_created)
-        consumed_cum.append(c_consumed)
-    # Converter minutos para horas
-    times_h = [t / 60.0 for t in times]
+    # Construir séries cumulativas: um ponto por evento; com where='post' o degrau se mantém até o próximo instante
+    times_h = [t / 60.0 for t, _, _ in events_sorted]  # minutos -> horas
+    created_cum = list(accumulate(int(tipo == 'created') for _, tipo, _ in events_sorted))
+    consumed_cum = list(accumulate(int(tipo == 'consumed') for _, tipo, _ in events_sorted))
     import matplotlib.pyplot as _plt  # garantir namespace local
     _plt.figure(figsize=(10, 6))
     _plt.step(times_h, created_cum, where='post', label='Criados (acum.)')